@@ -0,0 +1,221 @@
+"""Append-only log of graph mutations.
+
+`UserCRUD` appends one binary record per successful create/update/follow/
+unfollow/delete. Deleting a user first logs an unfollow for each of its
+edges, so edge consumers need not special-case deletions. Consumers
+(search index, leaderboard, recommendation tables, ...) either subscribe
+for live events or replay from the offset they last processed to catch up
+after a restart.
+
+Record layout (little endian):
+
+    length  uint32   size of everything after the crc
+    crc     uint32   crc32 of that payload
+    op      uint8    one of the OP_* codes
+    time    float64  unix timestamp
+    count   uint8    number of string fields
+    fields  count x (uint32 length + UTF-8 bytes)
+
+An event's offset is the byte position of its record, so offsets are stable
+and a consumer resumes at `event.next_offset`. Password hashes are never
+logged.
+
+Several processes may share one log file: every append, and the torn-tail
+check on open, holds an exclusive `flock` on it and writes at the file's
+real end, so records never interleave. Replay sees every process's
+records; subscribers only hear about this process's own appends.
+"""
+import fcntl
+import os
+import struct
+import threading
+import time
+import zlib
+from typing import Callable, Iterator, NamedTuple, Optional
+
+OP_CREATE_USER = 1
+OP_UPDATE_USER = 2
+OP_FOLLOW = 3
+OP_UNFOLLOW = 4
+OP_DELETE_USER = 5
+
+OP_NAMES = {
+    OP_CREATE_USER: "create_user",
+    OP_UPDATE_USER: "update_user",
+    OP_FOLLOW: "follow",
+    OP_UNFOLLOW: "unfollow",
+    OP_DELETE_USER: "delete_user",
+}
+
+_FRAME = struct.Struct("<II")
+_HEAD = struct.Struct("<BdB")
+_FIELD = struct.Struct("<I")
+
+
+class ChangeEvent(NamedTuple):
+    offset: int
+    next_offset: int
+    op: int
+    timestamp: float
+    fields: tuple
+
+    @property
+    def op_name(self) -> str:
+        return OP_NAMES.get(self.op, str(self.op))
+
+
+def _encode(op: int, timestamp: float, fields: tuple) -> bytes:
+    parts = [_HEAD.pack(op, timestamp, len(fields))]
+    for field in fields:
+        data = ("" if field is None else str(field)).encode("utf-8")
+        parts.append(_FIELD.pack(len(data)))
+        parts.append(data)
+    payload = b"".join(parts)
+    return _FRAME.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+def _decode(payload: bytes) -> tuple[int, float, tuple]:
+    op, timestamp, count = _HEAD.unpack_from(payload)
+    pos = _HEAD.size
+    fields = []
+    for _ in range(count):
+        (length,) = _FIELD.unpack_from(payload, pos)
+        pos += _FIELD.size
+        fields.append(payload[pos:pos + length].decode("utf-8"))
+        pos += length
+    return op, timestamp, tuple(fields)
+
+
+def _read_records(f, start: int, end: Optional[int] = None) -> Iterator[ChangeEvent]:
+    """Yield valid records from `start`, stopping at `end`, EOF or a torn/corrupt record."""
+    f.seek(start)
+    offset = start
+    while end is None or offset < end:
+        frame = f.read(_FRAME.size)
+        if len(frame) < _FRAME.size:
+            return
+        length, crc = _FRAME.unpack(frame)
+        payload = f.read(length)
+        if len(payload) < length or zlib.crc32(payload) != crc:
+            return
+        op, timestamp, fields = _decode(payload)
+        next_offset = offset + _FRAME.size + length
+        yield ChangeEvent(offset, next_offset, op, timestamp, fields)
+        offset = next_offset
+
+
+class ChangeLog:
+    """A single append-only log file with live subscribers and offset replay."""
+
+    def __init__(self, path: str, fsync: bool = False):
+        self.path = path
+        self.fsync = fsync
+        self._lock = threading.Lock()
+        self._subscribers: list[Callable[[ChangeEvent], None]] = []
+
+        # drop a record left half-written by a crash so appends start clean;
+        # under the lock no other process can be midway through one
+        self._file = open(path, "a+b")
+        fcntl.flock(self._file, fcntl.LOCK_EX)
+        try:
+            end = 0
+            for event in _read_records(self._file, 0):
+                end = event.next_offset
+            if end != os.fstat(self._file.fileno()).st_size:
+                print(f"Warning: truncating torn change log tail at offset {end}")
+                self._file.truncate(end)
+        finally:
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+
+    @property
+    def end_offset(self) -> int:
+        """Offset the next record will be written at, by this or any other process."""
+        with self._lock:
+            return self._shared_end()
+
+    def _shared_end(self) -> int:
+        # appends hold LOCK_EX, so under LOCK_SH the size is a record boundary
+        fcntl.flock(self._file, fcntl.LOCK_SH)
+        try:
+            return os.fstat(self._file.fileno()).st_size
+        finally:
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+
+    def append(self, op: int, *fields) -> ChangeEvent:
+        """Write one record, then hand it to every subscriber."""
+        timestamp = time.time()
+        record = _encode(op, timestamp, fields)
+        with self._lock:
+            fcntl.flock(self._file, fcntl.LOCK_EX)
+            try:
+                # another process may have appended since our last write
+                offset = self._file.seek(0, os.SEEK_END)
+                try:
+                    self._file.write(record)
+                    self._file.flush()
+                    if self.fsync:
+                        os.fsync(self._file.fileno())
+                except BaseException:
+                    # don't leave a partial record for the next append to
+                    # follow; nothing past `offset` is anyone else's yet
+                    self._file.truncate(offset)
+                    raise
+            finally:
+                fcntl.flock(self._file, fcntl.LOCK_UN)
+            event = ChangeEvent(offset, offset + len(record), op, timestamp, tuple("" if f is None else str(f) for f in fields))
+            subscribers = list(self._subscribers)
+        for callback in subscribers:
+            try:
+                callback(event)
+            except Exception as e:
+                # a broken consumer must not fail the write that already happened
+                print(f"Warning: change log subscriber failed on offset {offset}: {e}")
+        return event
+
+    def replay(self, from_offset: int = 0, to_offset: Optional[int] = None) -> Iterator[ChangeEvent]:
+        """Iterate the events in [from_offset, to_offset), defaulting to the current end."""
+        end = self.end_offset if to_offset is None else to_offset
+        with open(self.path, "rb") as f:
+            yield from _read_records(f, from_offset, end)
+
+    def subscribe(self, callback: Callable[[ChangeEvent], None], from_offset: Optional[int] = None) -> Callable[[], None]:
+        """Register `callback` for new events; returns a function that unsubscribes.
+
+        With `from_offset` the backlog from that offset is replayed first.
+        Appends wait meanwhile, so no event is missed or delivered twice.
+        """
+        with self._lock:
+            if from_offset is not None:
+                for event in self.replay(from_offset, self._shared_end()):
+                    callback(event)
+            self._subscribers.append(callback)
+
+        def unsubscribe():
+            with self._lock:
+                if callback in self._subscribers:
+                    self._subscribers.remove(callback)
+
+        return unsubscribe
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+def edge_deltas(events) -> tuple[list[tuple[str, str]], list[tuple[str, str]]]:
+    """Split follow/unfollow events into (added, removed) edge lists, netting out pairs."""
+    added: dict[tuple[str, str], None] = {}
+    removed: dict[tuple[str, str], None] = {}
+    for event in events:
+        edge = event.fields[:2]
+        if event.op == OP_FOLLOW:
+            if edge in removed:
+                del removed[edge]
+            else:
+                added[edge] = None
+        elif event.op == OP_UNFOLLOW:
+            if edge in added:
+                del added[edge]
+            else:
+                removed[edge] = None
+    return list(added), list(removed)
@@ -1,36 +1,73 @@
 from neo4j import GraphDatabase
 import os
+import time
 from dotenv import load_dotenv
-from typing import Optional
+from typing import Callable, Iterable, Iterator, Optional
 
 from neo4j import GraphDatabase
 
+from utils.profiling import instrument_driver, profile_methods
+from changelog import ChangeLog, OP_NAMES, OP_CREATE_USER, OP_UPDATE_USER, OP_FOLLOW, OP_UNFOLLOW, OP_DELETE_USER
+
 load_dotenv()
 
 NEO4J_URI = os.getenv("NEO4J_URI")
 NEO4J_USERNAME = os.getenv("NEO4J_USERNAME")
 NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD")
+# Optional path of the append-only change log (see changelog.py)
+CHANGELOG_PATH = os.getenv("CHANGELOG_PATH")
+# Optional false-positive rate (e.g. 0.01) enabling the username Bloom filter
+USERNAME_FILTER_FPR = float(os.getenv("USERNAME_FILTER_FPR") or 0) or None
+# Seconds between rebuilds of that filter from the DB
+USERNAME_FILTER_TTL = float(os.getenv("USERNAME_FILTER_TTL") or 60)
+# Optional number of graph worker processes serving graph reads (see graph/workers.py)
+GRAPH_WORKERS = int(os.getenv("GRAPH_WORKERS") or 0) or None
+# Seconds between rebuilds of their snapshot
+GRAPH_WORKERS_REFRESH = float(os.getenv("GRAPH_WORKERS_REFRESH") or 60)
 
 
+@profile_methods("crud")
 class UserCRUD:
-    def __init__(self, uri, user, password):
-        self.driver = GraphDatabase.driver(uri, auth=(user, password))
-        self.driver.verify_connectivity()
-        print("Connection to AuraDB established successfully!")
-        # Ensure uniqueness constraint on username exists (idempotent)
+    def __init__(self, uri, user, password, changelog: Optional[ChangeLog] = None):
+        # The driver is created on first use so constructing a UserCRUD costs
+        # nothing; constraints and indexes are owned by schema.py migrations.
+        self._uri = uri
+        self._auth = (user, password)
+        self._driver = None
+        # every successful mutation is appended here when set
+        self.changelog = changelog
+
+    @property
+    def driver(self):
+        if self._driver is None:
+            driver = GraphDatabase.driver(self._uri, auth=self._auth)
+            try:
+                # surface bad credentials or an unreachable URI here, on first
+                # use, rather than from the middle of some query
+                driver.verify_connectivity()
+            except Exception:
+                driver.close()
+                raise
+            self._driver = instrument_driver(driver)
+        return self._driver
+
+    def _log(self, op: int, *fields):
+        """Append a change log record for a mutation that already committed.
+
+        A failing append (full disk, ...) is reported but not raised, since
+        the caller's change is in the DB either way.
+        """
+        if self.changelog is None:
+            return
         try:
-            with self.driver.session() as session:
-                session.run(
-                    "CREATE CONSTRAINT user_username_unique IF NOT EXISTS FOR (u:User) REQUIRE u.username IS UNIQUE"
-                )
-                print("Ensured unique constraint on :User(username)")
+            self.changelog.append(op, *fields)
         except Exception as e:
-            # Log and continue; constraint creation may require appropriate privileges
-            print(f"Warning: failed to create username uniqueness constraint: {e}")
+            print(f"Warning: change log append failed for {OP_NAMES.get(op, op)}: {e}")
 
     def __del__(self):
         try:
-            self.driver.close()
+            if self._driver is not None:
+                self._driver.close()
         except Exception:
             pass
 
@@ -64,6 +101,9 @@ class UserCRUD:
                 bio=bio,
             )
             record = result.single()
+            # MERGE returns the existing node for a taken username; only log real creations
+            if record and record["userId"] == user_id:
+                self._log(OP_CREATE_USER, user_id, username, name, email, bio)
             return record.data() if record else None
 
     def get_user(self, user_id: str):
@@ -84,6 +124,41 @@ class UserCRUD:
             record = result.single()
             return record.data() if record else None
 
+    def get_users_by_usernames(self, usernames: list) -> tuple[list, list]:
+        """Fetch many users in one round trip.
+
+        Returns (user dicts in the order of `usernames`, usernames not found).
+        """
+        return self._get_users_by("username", usernames)
+
+    def get_users_by_ids(self, user_ids: list) -> tuple[list, list]:
+        """Fetch many users by userId in one round trip; same shape as `get_users_by_usernames`."""
+        return self._get_users_by("userId", user_ids)
+
+    def _get_users_by(self, key: str, values: list) -> tuple[list, list]:
+        unique = list(dict.fromkeys(values))
+        if not unique:
+            return [], []
+        with self.driver.session() as session:
+            # `key` is one of two fixed property names, never user input
+            result = session.run(
+                f"""
+                UNWIND $values AS value
+                MATCH (u:User {{{key}: value}})
+                RETURN value, u.userId AS userId, u.username AS username, u.name AS name,
+                       u.email AS email, u.bio AS bio,
+                       u.followersCount AS followersCount, u.followingCount AS followingCount
+                """,
+                values=unique,
+            )
+            found = {}
+            for r in result:
+                data = r.data()
+                found[data.pop("value")] = data
+        rows = [found[v] for v in values if v in found]
+        missing = [v for v in unique if v not in found]
+        return rows, missing
+
     def update_user(self, user_id: str, username: Optional[str] = None, password_hash: Optional[str] = None, name: Optional[str] = None, email: Optional[str] = None, bio=None):
         """
         Updates fields on a user node based on provided, non-None values.
@@ -122,11 +197,94 @@ class UserCRUD:
             """
             result = session.run(query, parameters=params)
             record = result.single()
+            if record and self.changelog:
+                # log which fields changed; the password hash itself is never logged
+                changes = []
+                for key in ("username", "name", "email", "bio"):
+                    if key in params:
+                        changes += [key, params[key]]
+                if password_hash is not None:
+                    changes += ["passwordHash", ""]
+                self._log(OP_UPDATE_USER, user_id, *changes)
             return record.data() if record else None
 
-    def delete_user(self, user_id: str):
+    def delete_user(self, user_id: str, batch_size: int = 1000, on_batch: Optional[Callable[[dict], None]] = None) -> Optional[dict]:
+        """Delete a user and all its FOLLOWS edges in bounded transactions.
+
+        The user is first flagged `deletionPending` (which also stops new
+        follows of it). Edges are then removed `batch_size` at a time, each
+        batch decrementing the neighbors' counters in the same transaction, so
+        no transaction holds more than `batch_size` locks and an interrupted
+        run is finished by calling this again (or `resume_pending_deletions`).
+        `on_batch` receives {direction, removed, seconds} after every batch.
+        Each removed edge is logged as an unfollow, then the user as deleted.
+
+        Returns {userId, username, following, followers, batches}, or None if
+        the user does not exist.
+        """
         with self.driver.session() as session:
-            session.run("MATCH (u:User {userId: $userId}) DELETE u", userId=user_id)
+            record = session.run(
+                "MATCH (u:User {userId: $userId}) SET u.deletionPending = true RETURN u.username AS username",
+                userId=user_id,
+            ).single()
+            if not record:
+                return None
+            stats = {"userId": user_id, "username": record["username"], "following": 0, "followers": 0, "batches": 0}
+
+            # One query per direction; each run is its own auto-commit transaction.
+            # The removed count is applied to the user's own counter at the end of the batch.
+            batches = {
+                "following": """
+                MATCH (u:User {userId: $userId})-[r:FOLLOWS]->(v:User)
+                WITH u, r, v LIMIT $batchSize
+                DELETE r
+                SET v.followersCount = coalesce(v.followersCount, 1) - 1
+                WITH u, collect(v.username) AS neighbors
+                WITH u, neighbors, size(neighbors) AS removed
+                SET u.followingCount = coalesce(u.followingCount, removed) - removed
+                RETURN neighbors
+                """,
+                "followers": """
+                MATCH (u:User {userId: $userId})<-[r:FOLLOWS]-(v:User)
+                WITH u, r, v LIMIT $batchSize
+                DELETE r
+                SET v.followingCount = coalesce(v.followingCount, 1) - 1
+                WITH u, collect(v.username) AS neighbors
+                WITH u, neighbors, size(neighbors) AS removed
+                SET u.followersCount = coalesce(u.followersCount, removed) - removed
+                RETURN neighbors
+                """,
+            }
+            for direction, query in batches.items():
+                while True:
+                    start = time.perf_counter()
+                    record = session.run(query, userId=user_id, batchSize=batch_size).single()
+                    neighbors = record["neighbors"] if record else []
+                    removed = len(neighbors)
+                    if not removed:
+                        break
+                    # log every removed edge so change log consumers drop it too
+                    for neighbor in neighbors:
+                        if direction == "following":
+                            self._log(OP_UNFOLLOW, stats["username"], neighbor)
+                        else:
+                            self._log(OP_UNFOLLOW, neighbor, stats["username"])
+                    stats[direction] += removed
+                    stats["batches"] += 1
+                    if on_batch:
+                        on_batch({"direction": direction, "removed": removed, "seconds": time.perf_counter() - start})
+
+            # no edges left, so a plain DELETE cannot fail
+            session.run("MATCH (u:User {userId: $userId}) DELETE u", userId=user_id).consume()
+            self._log(OP_DELETE_USER, user_id, stats["username"])
+            return stats
+
+    def resume_pending_deletions(self, batch_size: int = 1000) -> list:
+        """Finish deletions that were interrupted; returns their stats."""
+        with self.driver.session() as session:
+            result = session.run("MATCH (u:User) WHERE u.deletionPending = true RETURN u.userId AS userId")
+            user_ids = [r["userId"] for r in result]
+        return [self.delete_user(user_id, batch_size=batch_size) for user_id in user_ids]
 
     def follow_user(self, follower_username: str, followee_username: str) -> bool:
         """
@@ -145,6 +303,7 @@ class UserCRUD:
             query = """
             MATCH (follower:User {username: $follower_username})
             MATCH (followee:User {username: $followee_username})
+            WHERE follower.deletionPending IS NULL AND followee.deletionPending IS NULL
             MERGE (follower)-[f:FOLLOWS]->(followee)
             ON CREATE SET f.since = datetime()
             ON CREATE SET 
@@ -159,7 +318,10 @@ class UserCRUD:
             )
             # If a row is returned, the MERGE was successful (either created or matched)
             # However, the counter only increments on CREATE, which is what we want.
-            return bool(result.single())
+            ok = bool(result.single())
+            if result.consume().counters.relationships_created:
+                self._log(OP_FOLLOW, follower_username, followee_username)
+            return ok
 
     def unfollow_user(self, follower_username: str, followee_username: str) -> bool:
         """
@@ -189,14 +351,22 @@ class UserCRUD:
                 followee_username=followee_username
             )
             # The result will be empty if the relationship didn't exist/wasn't deleted.
-            return bool(result.single())
+            ok = bool(result.single())
+            if ok:
+                self._log(OP_UNFOLLOW, follower_username, followee_username)
+            return ok
+
+    def get_followers_for_user(self, username: str, skip: int = 0, limit: int = 100, after: Optional[str] = None) -> list:
+        """Return list of follower user dicts for `username`, with pagination.
 
-    def get_followers_for_user(self, username: str, skip: int = 0, limit: int = 100) -> list:
-        """Return list of follower user dicts for `username`, with pagination."""
+        `after` is a keyset cursor: only followers whose username sorts after
+        it are returned, so deep pages cost the same as the first one.
+        """
         with self.driver.session() as session:
             result = session.run(
                 """
                 MATCH (f:User)-[:FOLLOWS]->(u:User {username: $username})
+                WHERE $after IS NULL OR f.username > $after
                 RETURN f.userId AS userId, f.username AS username, f.name AS name, f.email AS email,
                        f.followersCount AS followersCount, f.followingCount AS followingCount
                 ORDER BY f.username SKIP $skip LIMIT $limit
@@ -204,15 +374,17 @@ class UserCRUD:
                 username=username,
                 skip=skip,
                 limit=limit,
+                after=after,
             )
             return [r.data() for r in result]
 
-    def get_following_for_user(self, username: str, skip: int = 0, limit: int = 100) -> list:
-        """Return list of users that `username` follows, with pagination."""
+    def get_following_for_user(self, username: str, skip: int = 0, limit: int = 100, after: Optional[str] = None) -> list:
+        """Return list of users that `username` follows, with pagination (see `after` above)."""
         with self.driver.session() as session:
             result = session.run(
                 """
                 MATCH (u:User {username: $username})-[:FOLLOWS]->(followee:User)
+                WHERE $after IS NULL OR followee.username > $after
                 RETURN followee.userId AS userId, followee.username AS username, followee.name AS name, followee.email AS email,
                        followee.followersCount AS followersCount, followee.followingCount AS followingCount
                 ORDER BY followee.username SKIP $skip LIMIT $limit
@@ -220,6 +392,7 @@ class UserCRUD:
                 username=username,
                 skip=skip,
                 limit=limit,
+                after=after,
             )
             return [r.data() for r in result]
         
@@ -272,20 +445,260 @@ class UserCRUD:
             result = session.run(query, term=query_term)
             return [r.data() for r in result]
         
-    def get_popular_users(self):
-        """Return top 10 users with the highest follower counts."""
+    def get_popular_users(self, by_influence: bool = False):
+        """Return top 10 users with the highest follower counts.
+
+        With `by_influence` rank by the PageRank `influenceScore` written by
+        the influence job instead; the IS NOT NULL predicate lets the planner
+        serve the ORDER BY from the `user_influence_score` range index
+        (see schema.py).
+        """
         with self.driver.session() as session:
-            query = """
-            MATCH (u:User)
-            RETURN u.userId AS userId, u.username AS username, u.name AS name, 
-                   u.email AS email, u.bio AS bio,
-                   u.followersCount AS followersCount, u.followingCount AS followingCount
-            ORDER BY u.followersCount DESC
-            LIMIT 10
-            """
+            if by_influence:
+                query = """
+                MATCH (u:User)
+                WHERE u.influenceScore IS NOT NULL
+                RETURN u.userId AS userId, u.username AS username, u.name AS name, 
+                       u.email AS email, u.bio AS bio,
+                       u.followersCount AS followersCount, u.followingCount AS followingCount,
+                       u.influenceScore AS influenceScore
+                ORDER BY u.influenceScore DESC
+                LIMIT 10
+                """
+            else:
+                query = """
+                MATCH (u:User)
+                RETURN u.userId AS userId, u.username AS username, u.name AS name, 
+                       u.email AS email, u.bio AS bio,
+                       u.followersCount AS followersCount, u.followingCount AS followingCount
+                ORDER BY u.followersCount DESC
+                LIMIT 10
+                """
             result = session.run(query)
             return [r.data() for r in result]
 
+    def write_influence_scores(self, rows: list):
+        """Write one batch of {username, score, component} rows in a single UNWIND."""
+        with self.driver.session() as session:
+            session.run(
+                """
+                UNWIND $rows AS row
+                MATCH (u:User {username: row.username})
+                SET u.influenceScore = row.score,
+                    u.componentId = row.component
+                """,
+                rows=rows,
+            )
+
+    def get_all_usernames(self) -> list:
+        """Return every username, used to build the in-process graph."""
+        with self.driver.session() as session:
+            result = session.run("MATCH (u:User) RETURN u.username AS username")
+            return [r["username"] for r in result]
+
+    def get_all_users(self) -> list:
+        """Return every user's public profile fields (no password hash)."""
+        with self.driver.session() as session:
+            result = session.run(
+                "MATCH (u:User) RETURN u.userId AS userId, u.username AS username, u.name AS name, u.email AS email, u.bio AS bio"
+            )
+            return [r.data() for r in result]
+
+    def get_all_follow_edges(self) -> list:
+        """Return every FOLLOWS relationship as a (follower, followee) username pair."""
+        with self.driver.session() as session:
+            result = session.run(
+                "MATCH (a:User)-[:FOLLOWS]->(b:User) RETURN a.username AS follower, b.username AS followee"
+            )
+            return [(r["follower"], r["followee"]) for r in result]
+
+    def scan_counter_drift(self, after: Optional[str] = None, batch_size: int = 1000) -> list:
+        """Compare stored counters with the real FOLLOWS degree for one keyset batch.
+
+        Returns a row per user with username > `after` (up to `batch_size`,
+        ordered by username) holding the stored and actual counts. Read-only.
+        """
+        # Two query texts rather than `$after IS NULL OR u.username > $after`:
+        # that disjunction can't be planned as a seek, so every batch would
+        # scan all users. Each predicate here is served by the username
+        # constraint index, which also provides the ORDER BY.
+        where = "u.username > $after" if after is not None else "u.username IS NOT NULL"
+        with self.driver.session() as session:
+            result = session.run(
+                f"""
+                MATCH (u:User)
+                WHERE {where}
+                WITH u ORDER BY u.username LIMIT $batchSize
+                RETURN u.username AS username,
+                       u.followersCount AS storedFollowers, u.followingCount AS storedFollowing,
+                       COUNT {{ (u)<-[:FOLLOWS]-(:User) }} AS followers,
+                       COUNT {{ (u)-[:FOLLOWS]->(:User) }} AS following
+                """,
+                after=after,
+                batchSize=batch_size,
+            )
+            return [r.data() for r in result]
+
+    def repair_counters(self, usernames: list) -> int:
+        """Reset the counters of `usernames` to their actual degree in one write transaction.
+
+        Each node is write-locked (by stamping `countersCheckedAt`) before its
+        degree is counted, so a concurrent follow/unfollow either commits
+        before the count or waits until after the repair. Those locks can
+        deadlock with a follow; the transaction runs through
+        `execute_write`, which retries transient errors like that. Returns
+        how many users actually changed.
+        """
+        def repair(tx):
+            record = tx.run(
+                """
+                UNWIND $names AS name
+                MATCH (u:User {username: name})
+                SET u.countersCheckedAt = datetime()
+                WITH u,
+                     COUNT { (u)<-[:FOLLOWS]-(:User) } AS followers,
+                     COUNT { (u)-[:FOLLOWS]->(:User) } AS following
+                WHERE u.followersCount IS NULL OR u.followersCount <> followers
+                   OR u.followingCount IS NULL OR u.followingCount <> following
+                SET u.followersCount = followers, u.followingCount = following
+                RETURN count(u) AS repaired
+                """,
+                names=usernames,
+            ).single()
+            return record["repaired"] if record else 0
+
+        with self.driver.session() as session:
+            return session.execute_write(repair)
+
+    # Streaming reads. Records are pulled from the server `fetch_size` at a
+    # time while the caller iterates, so memory stays flat however large the
+    # result is. The session stays open until the generator is exhausted or
+    # closed.
+
+    def iter_users(self, fetch_size: int = 1000, include_password_hash: bool = False) -> Iterator[dict]:
+        """Stream every user's profile."""
+        password = "u.passwordHash" if include_password_hash else "null"
+        with self.driver.session(fetch_size=fetch_size) as session:
+            result = session.run(
+                f"""
+                MATCH (u:User)
+                RETURN u.userId AS userId, u.username AS username, u.name AS name, u.email AS email,
+                       {password} AS passwordHash, u.bio AS bio,
+                       u.followersCount AS followersCount, u.followingCount AS followingCount
+                """
+            )
+            for r in result:
+                yield r.data()
+
+    def iter_follow_edges(self, fetch_size: int = 1000) -> Iterator[tuple]:
+        """Stream every FOLLOWS relationship as a (follower, followee) username pair."""
+        with self.driver.session(fetch_size=fetch_size) as session:
+            result = session.run(
+                "MATCH (a:User)-[:FOLLOWS]->(b:User) RETURN a.username AS follower, b.username AS followee"
+            )
+            for r in result:
+                yield r["follower"], r["followee"]
+
+    def get_neighborhood_usernames(self, username: str, hops: int, chunk_size: int = 1000) -> list:
+        """Usernames within `hops` FOLLOWS edges of `username`, in either direction.
+
+        Expands one level at a time from the previous frontier (in chunks)
+        instead of a variable-length match, which would enumerate every path
+        through a hub. Only usernames are kept, never full records.
+        """
+        if not self.get_user_by_username(username):
+            return []
+        seen = {username}
+        order = [username]
+        frontier = [username]
+        with self.driver.session() as session:
+            for _ in range(hops):
+                next_frontier = []
+                for i in range(0, len(frontier), chunk_size):
+                    result = session.run(
+                        """
+                        UNWIND $names AS name
+                        MATCH (:User {username: name})-[:FOLLOWS]-(n:User)
+                        RETURN DISTINCT n.username AS username
+                        """,
+                        names=frontier[i:i + chunk_size],
+                    )
+                    for r in result:
+                        if r["username"] not in seen:
+                            seen.add(r["username"])
+                            order.append(r["username"])
+                            next_frontier.append(r["username"])
+                frontier = next_frontier
+                if not frontier:
+                    break
+        return order
+
+    def iter_users_by_usernames(self, usernames: Iterable[str], chunk_size: int = 1000, include_password_hash: bool = False) -> Iterator[dict]:
+        """Stream the profiles of `usernames`, querying them `chunk_size` at a time."""
+        password = "u.passwordHash" if include_password_hash else "null"
+        with self.driver.session() as session:
+            for chunk in _chunks(usernames, chunk_size):
+                result = session.run(
+                    f"""
+                    UNWIND $names AS name
+                    MATCH (u:User {{username: name}})
+                    RETURN u.userId AS userId, u.username AS username, u.name AS name, u.email AS email,
+                           {password} AS passwordHash, u.bio AS bio,
+                           u.followersCount AS followersCount, u.followingCount AS followingCount
+                    """,
+                    names=chunk,
+                )
+                for r in result:
+                    yield r.data()
+
+    def iter_follow_neighbors(self, usernames: list, reverse: bool = False, chunk_size: int = 1000) -> Iterator[tuple]:
+        """Stream (username, neighbor) pairs one FOLLOWS hop from each of `usernames`.
+
+        Neighbors are followees, or followers with `reverse=True`. Used to
+        expand a whole BFS frontier with one query per chunk.
+        """
+        pattern = "(:User {username: name})<-[:FOLLOWS]-(n:User)" if reverse else "(:User {username: name})-[:FOLLOWS]->(n:User)"
+        with self.driver.session() as session:
+            for chunk in _chunks(usernames, chunk_size):
+                result = session.run(
+                    f"""
+                    UNWIND $names AS name
+                    MATCH {pattern}
+                    RETURN name, n.username AS neighbor
+                    """,
+                    names=chunk,
+                )
+                for r in result:
+                    yield r["name"], r["neighbor"]
+
+    def iter_follow_edges_among(self, usernames: list, chunk_size: int = 1000) -> Iterator[tuple]:
+        """Stream the FOLLOWS edges whose two ends are both in `usernames`."""
+        members = set(usernames)
+        with self.driver.session() as session:
+            for chunk in _chunks(usernames, chunk_size):
+                result = session.run(
+                    """
+                    UNWIND $names AS name
+                    MATCH (a:User {username: name})-[:FOLLOWS]->(b:User)
+                    RETURN a.username AS follower, b.username AS followee
+                    """,
+                    names=chunk,
+                )
+                for r in result:
+                    if r["followee"] in members:
+                        yield r["follower"], r["followee"]
+
+
+def _chunks(items: Iterable, size: int) -> Iterator[list]:
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
 
 if __name__ == "__main__":
     crud = UserCRUD(NEO4J_URI, NEO4J_USERNAME, NEO4J_PASSWORD)
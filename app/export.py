@@ -0,0 +1,107 @@
+"""Streaming export of the whole graph or one user's k-hop neighborhood.
+
+Formats:
+    csv       users.csv + connections.csv in the `data/` schema (seed.py can load them)
+    ndjson    one JSON object per line: {"type": "user", ...} / {"type": "follows", ...}
+    snapshot  the binary format from graph/snapshot.py
+
+CSV and NDJSON are written record by record as they arrive from the
+driver, so memory stays flat. A snapshot stores CSR arrays, which need every
+edge before the file can be written; it holds the graph as compact arrays.
+
+Usage (from app/):
+    python export.py csv ../export
+    python export.py ndjson graph.ndjson --user alice --hops 2
+    python export.py snapshot graph.bbsnap
+"""
+import argparse
+import csv
+import json
+import os
+from typing import Iterator, Optional
+
+from database import UserCRUD, NEO4J_URI, NEO4J_USERNAME, NEO4J_PASSWORD
+from graph.follow_graph import FollowGraph
+from graph.snapshot import write_snapshot
+
+USER_FIELDS = ["userId", "username", "name", "email", "passwordHash", "bio"]
+CONNECTION_FIELDS = ["follower_username", "followee_username"]
+
+
+def _sources(crud: UserCRUD, username: Optional[str], hops: int, fetch_size: int, include_password_hash: bool) -> tuple[Iterator[dict], Iterator[tuple]]:
+    if username is None:
+        return (
+            crud.iter_users(fetch_size=fetch_size, include_password_hash=include_password_hash),
+            crud.iter_follow_edges(fetch_size=fetch_size),
+        )
+    members = crud.get_neighborhood_usernames(username, hops)
+    return (
+        crud.iter_users_by_usernames(members, include_password_hash=include_password_hash),
+        crud.iter_follow_edges_among(members),
+    )
+
+
+def export_csv(crud: UserCRUD, out_dir: str, username: Optional[str] = None, hops: int = 1, fetch_size: int = 1000, include_password_hash: bool = False) -> tuple[int, int]:
+    """Write users.csv and connections.csv into `out_dir`; returns (users, edges)."""
+    os.makedirs(out_dir, exist_ok=True)
+    users, edges = _sources(crud, username, hops, fetch_size, include_password_hash)
+    user_count = edge_count = 0
+    with open(os.path.join(out_dir, "users.csv"), "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=USER_FIELDS, extrasaction="ignore")
+        writer.writeheader()
+        for row in users:
+            writer.writerow(row)
+            user_count += 1
+    with open(os.path.join(out_dir, "connections.csv"), "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(CONNECTION_FIELDS)
+        for edge in edges:
+            writer.writerow(edge)
+            edge_count += 1
+    return user_count, edge_count
+
+
+def export_ndjson(crud: UserCRUD, path: str, username: Optional[str] = None, hops: int = 1, fetch_size: int = 1000, include_password_hash: bool = False) -> tuple[int, int]:
+    """Write users then edges as newline-delimited JSON; returns (users, edges)."""
+    users, edges = _sources(crud, username, hops, fetch_size, include_password_hash)
+    user_count = edge_count = 0
+    with open(path, "w", encoding="utf-8") as f:
+        for row in users:
+            if not include_password_hash:
+                row.pop("passwordHash", None)
+            f.write(json.dumps({"type": "user", **row}) + "\n")
+            user_count += 1
+        for follower, followee in edges:
+            f.write(json.dumps({"type": "follows", "follower": follower, "followee": followee}) + "\n")
+            edge_count += 1
+    return user_count, edge_count
+
+
+def export_snapshot(crud: UserCRUD, path: str, username: Optional[str] = None, hops: int = 1, fetch_size: int = 1000) -> tuple[int, int]:
+    """Write a binary snapshot; returns (users, edges)."""
+    users, edges = _sources(crud, username, hops, fetch_size, include_password_hash=False)
+    profiles = {row["username"]: row for row in users}
+    graph = FollowGraph.from_edges(profiles, edges)
+    write_snapshot(path, graph, profiles)
+    return graph.num_users, graph.num_edges
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export the Buddy-Bloom graph.")
+    parser.add_argument("format", choices=("csv", "ndjson", "snapshot"))
+    parser.add_argument("output", help="directory for csv, file otherwise")
+    parser.add_argument("--user", help="export only this user's neighborhood")
+    parser.add_argument("--hops", type=int, default=1)
+    parser.add_argument("--fetch-size", type=int, default=1000)
+    parser.add_argument("--include-password-hash", action="store_true")
+    args = parser.parse_args()
+
+    crud = UserCRUD(NEO4J_URI, NEO4J_USERNAME, NEO4J_PASSWORD)
+    if args.format == "csv":
+        counts = export_csv(crud, args.output, args.user, args.hops, args.fetch_size, args.include_password_hash)
+    elif args.format == "ndjson":
+        counts = export_ndjson(crud, args.output, args.user, args.hops, args.fetch_size, args.include_password_hash)
+    else:
+        counts = export_snapshot(crud, args.output, args.user, args.hops, args.fetch_size)
+    print(f"Exported {counts[0]} users and {counts[1]} relationships to {args.output}.")
+    crud.driver.close()
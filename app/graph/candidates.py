@@ -0,0 +1,87 @@
+import heapq
+from collections import Counter
+from typing import Iterable, Optional
+
+from graph.follow_graph import FollowGraph
+from graph.ranking import friends_of_friends
+
+
+class CandidateIndex:
+    """Materialized friend-of-friend candidate scores, kept current by deltas.
+
+    `scores[a][c]` is the number of a's followees that follow c - the same
+    strength the 2-hop Cypher counts. Raw counts are stored (including a
+    itself and users a already follows) so that every follow/unfollow is a
+    pure +1/-1 delta; those users are filtered out when reading.
+    """
+
+    def __init__(self, graph: FollowGraph):
+        self.graph = graph
+        self.scores: dict[int, Counter] = {}
+        self.rebuild()
+
+    def rebuild(self):
+        """Recompute every user's candidate scores from the graph."""
+        self.scores = {}
+        for a in range(self.graph.num_users):
+            counts = self._recompute(a)
+            if counts:
+                self.scores[a] = counts
+
+    def on_follow(self, follower: int, followee: int):
+        """Apply a new follower -> followee edge (already added to the graph).
+
+        The follower gains each of the followee's followees as a candidate,
+        and everyone who follows the follower gains the followee.
+        """
+        self._apply(follower, followee, 1)
+
+    def on_unfollow(self, follower: int, followee: int):
+        """Undo `on_follow` for an edge that was removed from the graph."""
+        self._apply(follower, followee, -1)
+
+    def top(self, user: int, limit: int = 5) -> list[tuple[int, int]]:
+        """Best (candidate, strength) pairs for `user`, excluding self and followees."""
+        counts = self.scores.get(user)
+        if not counts:
+            return []
+        eligible = (
+            (c, n) for c, n in counts.items()
+            if c != user and not self.graph.has_edge(user, c)
+        )
+        return heapq.nlargest(limit, eligible, key=lambda item: item[1])
+
+    def check_consistency(self, users: Optional[Iterable[int]] = None) -> list[int]:
+        """Compare against a full 2-hop recomputation; return users that disagree."""
+        if users is None:
+            users = range(self.graph.num_users)
+        mismatched = []
+        for u in users:
+            expected = friends_of_friends(self.graph, u)
+            actual = Counter(dict(
+                (c, n) for c, n in self.scores.get(u, Counter()).items()
+                if c != u and not self.graph.has_edge(u, c)
+            ))
+            if expected != actual:
+                mismatched.append(u)
+        return mismatched
+
+    def _recompute(self, a: int) -> Counter:
+        counts: Counter = Counter()
+        for friend in self.graph.followees(a):
+            counts.update(self.graph.followees(friend))
+        return counts
+
+    def _apply(self, follower: int, followee: int, sign: int):
+        for c in self.graph.followees(followee):
+            self._bump(follower, c, sign)
+        for f in self.graph.followers(follower):
+            self._bump(f, followee, sign)
+
+    def _bump(self, owner: int, candidate: int, sign: int):
+        counts = self.scores.setdefault(owner, Counter())
+        counts[candidate] += sign
+        if counts[candidate] <= 0:
+            del counts[candidate]
+            if not counts:
+                del self.scores[owner]
@@ -0,0 +1,185 @@
+import csv
+from array import array
+from bisect import bisect_left, insort
+from typing import Iterable, Optional
+
+
+def build_csr(num_nodes: int, src: Iterable[int], dst: Iterable[int]) -> tuple[array, array]:
+    """Build CSR (offsets, targets) arrays from parallel source/target id lists.
+
+    Each row is sorted and de-duplicated so callers can binary-search a slice.
+    """
+    rows: list[list[int]] = [[] for _ in range(num_nodes)]
+    for a, b in zip(src, dst):
+        rows[a].append(b)
+
+    offsets = array("q", [0])
+    targets = array("i")
+    for row in rows:
+        if row:
+            targets.extend(sorted(set(row)))
+        offsets.append(len(targets))
+    return offsets, targets
+
+
+class FollowGraph:
+    """In-process copy of the FOLLOWS graph.
+
+    Usernames are interned to dense integer ids and the edges are stored as a
+    sparse matrix in CSR form (an offsets array plus a targets array) for both
+    directions, so a user's followees/followers are one contiguous slice.
+
+    Edge deltas (`add_edge`/`remove_edge`/`add_user`) don't rebuild the CSR
+    arrays: the touched rows are copied into sorted lists that shadow the base
+    slices until `compact()` folds them back in.
+    """
+
+    def __init__(self, usernames: list[str], out_offsets, out_targets, in_offsets, in_targets):
+        self.usernames = usernames
+        self._index: Optional[dict[str, int]] = None
+        # memoryviews make slicing zero-copy
+        self.out_offsets = memoryview(out_offsets)
+        self.out_targets = memoryview(out_targets)
+        self.in_offsets = memoryview(in_offsets)
+        self.in_targets = memoryview(in_targets)
+        self._out_rows: dict[int, list[int]] = {}
+        self._in_rows: dict[int, list[int]] = {}
+        self._num_edges = self.out_offsets[-1] if len(self.out_offsets) else 0
+
+    @classmethod
+    def from_edges(cls, usernames: Iterable[str], edges: Iterable[tuple[str, str]]) -> "FollowGraph":
+        """Build a graph from usernames and (follower, followee) username pairs.
+
+        Edges that reference unknown users or loop back to the same user are dropped.
+        """
+        names = list(dict.fromkeys(usernames))
+        index = {name: i for i, name in enumerate(names)}
+        src = array("i")
+        dst = array("i")
+        for follower, followee in edges:
+            a = index.get(follower)
+            b = index.get(followee)
+            if a is None or b is None or a == b:
+                continue
+            src.append(a)
+            dst.append(b)
+
+        out_offsets, out_targets = build_csr(len(names), src, dst)
+        in_offsets, in_targets = build_csr(len(names), dst, src)
+        return cls(names, out_offsets, out_targets, in_offsets, in_targets)
+
+    @classmethod
+    def from_csv(cls, users_path: str, connections_path: str) -> "FollowGraph":
+        """Load the graph from the `users.csv`/`connections.csv` files in `data/`."""
+        with open(users_path, "r", encoding="utf-8") as f:
+            usernames = [row["username"] for row in csv.DictReader(f)]
+        with open(connections_path, "r", encoding="utf-8") as f:
+            edges = [(row["follower_username"], row["followee_username"]) for row in csv.DictReader(f)]
+        return cls.from_edges(usernames, edges)
+
+    @classmethod
+    def from_crud(cls, crud) -> "FollowGraph":
+        """Load the whole FOLLOWS graph from Neo4j through a `UserCRUD`."""
+        return cls.from_edges(crud.get_all_usernames(), crud.iter_follow_edges())
+
+    @property
+    def index(self) -> dict[str, int]:
+        """username -> id, built on first lookup (hashing every name dominates load time)."""
+        if self._index is None:
+            self._index = dict(zip(self.usernames, range(len(self.usernames))))
+        return self._index
+
+    @property
+    def num_users(self) -> int:
+        return len(self.usernames)
+
+    @property
+    def num_edges(self) -> int:
+        return self._num_edges
+
+    def index_of(self, username: str) -> Optional[int]:
+        return self.index.get(username)
+
+    def followees(self, i: int):
+        """Ids of the users that user `i` follows (sorted)."""
+        row = self._out_rows.get(i)
+        if row is not None:
+            return row
+        return self.out_targets[self.out_offsets[i]:self.out_offsets[i + 1]]
+
+    def followers(self, i: int):
+        """Ids of the users that follow user `i` (sorted)."""
+        row = self._in_rows.get(i)
+        if row is not None:
+            return row
+        return self.in_targets[self.in_offsets[i]:self.in_offsets[i + 1]]
+
+    def out_degree(self, i: int) -> int:
+        return len(self.followees(i))
+
+    def in_degree(self, i: int) -> int:
+        return len(self.followers(i))
+
+    def has_edge(self, a: int, b: int) -> bool:
+        """True if user `a` follows user `b`."""
+        row = self.followees(a)
+        pos = bisect_left(row, b)
+        return pos < len(row) and row[pos] == b
+
+    def add_user(self, username: str) -> int:
+        """Intern `username` (if new) and return its id."""
+        i = self.index.get(username)
+        if i is None:
+            i = len(self.usernames)
+            self.usernames.append(username)
+            self.index[username] = i
+            self._out_rows[i] = []
+            self._in_rows[i] = []
+        return i
+
+    def add_edge(self, follower: str, followee: str) -> bool:
+        """Record follower -> followee; returns False if it already existed."""
+        a = self.add_user(follower)
+        b = self.add_user(followee)
+        if a == b or self.has_edge(a, b):
+            return False
+        insort(self._mutable_row(self._out_rows, a, self.followees), b)
+        insort(self._mutable_row(self._in_rows, b, self.followers), a)
+        self._num_edges += 1
+        return True
+
+    def remove_edge(self, follower: str, followee: str) -> bool:
+        """Drop follower -> followee; returns False if it did not exist."""
+        a = self.index.get(follower)
+        b = self.index.get(followee)
+        if a is None or b is None or not self.has_edge(a, b):
+            return False
+        out_row = self._mutable_row(self._out_rows, a, self.followees)
+        del out_row[bisect_left(out_row, b)]
+        in_row = self._mutable_row(self._in_rows, b, self.followers)
+        del in_row[bisect_left(in_row, a)]
+        self._num_edges -= 1
+        return True
+
+    def compact(self):
+        """Rebuild the CSR arrays so every row is a base slice again."""
+        if not self._out_rows and not self._in_rows:
+            return
+        n = self.num_users
+        src = array("i")
+        dst = array("i")
+        for a in range(n):
+            row = self.followees(a)
+            src.extend([a] * len(row))
+            dst.extend(row)
+        out_offsets, out_targets = build_csr(n, src, dst)
+        in_offsets, in_targets = build_csr(n, dst, src)
+        self.__init__(self.usernames, out_offsets, out_targets, in_offsets, in_targets)
+
+    @staticmethod
+    def _mutable_row(rows: dict, i: int, current) -> list[int]:
+        row = rows.get(i)
+        if row is None:
+            row = list(current(i))
+            rows[i] = row
+        return row
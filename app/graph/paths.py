@@ -0,0 +1,95 @@
+from typing import Callable, Hashable, Iterable, NamedTuple
+
+from graph.follow_graph import FollowGraph
+
+# Given a frontier, yield (node, neighbor) pairs one FOLLOWS hop away from it
+Expand = Callable[[list], Iterable[tuple[Hashable, Hashable]]]
+
+
+class ConnectionPath(NamedTuple):
+    # source ... target along FOLLOWS edges, or [] if none was found
+    path: list
+    # True if the hop or visited limit stopped the search before it was exhausted
+    truncated: bool
+    visited: int
+
+
+def bidirectional_search(source: Hashable, target: Hashable, expand_forward: Expand, expand_backward: Expand, max_hops: int = 6, max_visited: int = 100_000) -> ConnectionPath:
+    """Shortest directed path from `source` to `target`, searching from both ends.
+
+    `expand_forward` follows edges out of a frontier (followees) and
+    `expand_backward` follows them in (followers). Each round expands the
+    smaller of the two frontiers by one full level, so a hub on one side
+    doesn't blow up the search. Both expanders are called with a whole
+    frontier at a time, which lets a database backend fetch a level in a few
+    batched queries.
+    """
+    if source == target:
+        return ConnectionPath([source], False, 1)
+
+    # node -> (parent toward the side's root, depth)
+    fwd: dict = {source: (None, 0)}
+    bwd: dict = {target: (None, 0)}
+    fwd_frontier, bwd_frontier = [source], [target]
+    hops = 0
+    while fwd_frontier and bwd_frontier:
+        if hops >= max_hops or len(fwd) + len(bwd) >= max_visited:
+            return ConnectionPath([], True, len(fwd) + len(bwd))
+
+        forward = len(fwd_frontier) <= len(bwd_frontier)
+        if forward:
+            frontier, expand, seen, other = fwd_frontier, expand_forward, fwd, bwd
+        else:
+            frontier, expand, seen, other = bwd_frontier, expand_backward, bwd, fwd
+
+        # finish the whole level before picking a meeting point, so the
+        # shortest of the paths meeting at this level wins
+        best = None
+        next_frontier = []
+        for node, neighbor in expand(frontier):
+            if neighbor in seen:
+                continue
+            seen[neighbor] = (node, seen[node][1] + 1)
+            if neighbor in other:
+                length = seen[neighbor][1] + other[neighbor][1]
+                if best is None or length < best[0]:
+                    best = (length, neighbor)
+            else:
+                next_frontier.append(neighbor)
+            if len(fwd) + len(bwd) >= max_visited and best is None:
+                break
+        hops += 1
+
+        if best is not None:
+            return ConnectionPath(_join(fwd, bwd, best[1]), False, len(fwd) + len(bwd))
+        if forward:
+            fwd_frontier = next_frontier
+        else:
+            bwd_frontier = next_frontier
+    return ConnectionPath([], False, len(fwd) + len(bwd))
+
+
+def _join(fwd: dict, bwd: dict, meet: Hashable) -> list:
+    path = []
+    node = meet
+    while node is not None:
+        path.append(node)
+        node = fwd[node][0]
+    path.reverse()
+    node = bwd[meet][0]
+    while node is not None:
+        path.append(node)
+        node = bwd[node][0]
+    return path
+
+
+def shortest_follow_path(graph: FollowGraph, source: int, target: int, max_hops: int = 6, max_visited: int = 100_000) -> ConnectionPath:
+    """`bidirectional_search` over the in-process graph's CSR rows (user ids in, user ids out)."""
+    return bidirectional_search(
+        source,
+        target,
+        lambda frontier: ((u, v) for u in frontier for v in graph.followees(u)),
+        lambda frontier: ((u, v) for u in frontier for v in graph.followers(u)),
+        max_hops=max_hops,
+        max_visited=max_visited,
+    )
@@ -0,0 +1,206 @@
+import heapq
+import random
+import time
+from collections import Counter
+from typing import NamedTuple, Optional
+
+from graph.follow_graph import FollowGraph
+
+
+def friends_of_friends(graph: FollowGraph, source: int) -> Counter:
+    """In-process equivalent of the 2-hop Cypher in `get_friend_recommendations`.
+
+    Returns candidate id -> number of followees of `source` that follow it.
+    """
+    strength: Counter = Counter()
+    for friend in graph.followees(source):
+        for fof in graph.followees(friend):
+            strength[fof] += 1
+    strength.pop(source, None)
+    for friend in graph.followees(source):
+        strength.pop(friend, None)
+    return strength
+
+
+class BoundedRecommendations(NamedTuple):
+    candidates: list[tuple[int, int]]
+    # True if a hub was sampled or the budget ran out, i.e. strengths are lower bounds
+    truncated: bool
+    expanded: int
+
+
+def bounded_friends_of_friends(graph: FollowGraph, source: int, limit: int = 5, fanout_cap: int = 200, time_budget: float = 0.02, max_expansions: int = 50_000, seed: Optional[int] = None) -> BoundedRecommendations:
+    """2-hop recommendations with a bounded amount of work.
+
+    Friends are expanded from the lowest out-degree up, so the cheap and
+    most specific neighborhoods are counted first and hubs last. A friend
+    following more than `fanout_cap` users contributes only `fanout_cap` of
+    them: a uniform random pool of twice that size is drawn from its
+    followees and the most-followed members of the pool are kept, since
+    those are the likeliest to be shared with other friends. Expansion
+    stops once `time_budget` seconds or `max_expansions` visited edges are
+    used up, and the best candidates found so far are returned.
+    """
+    rng = random.Random(seed)
+    deadline = time.perf_counter() + time_budget
+    friends = sorted(graph.followees(source), key=graph.out_degree)
+    strength: Counter = Counter()
+    truncated = False
+    expanded = 0
+    for friend in friends:
+        if expanded >= max_expansions or time.perf_counter() > deadline:
+            truncated = True
+            break
+        row = graph.followees(friend)
+        if len(row) > fanout_cap:
+            # degree-aware sample: a hub's most-followed followees are the
+            # ones most likely to be shared with the user's other friends
+            pool = [row[i] for i in rng.sample(range(len(row)), min(len(row), fanout_cap * 2))]
+            row = heapq.nlargest(fanout_cap, pool, key=graph.in_degree)
+            truncated = True
+        budget = max_expansions - expanded
+        if len(row) > budget:
+            row = row[:budget]
+            truncated = True
+        strength.update(row)
+        expanded += len(row)
+
+    strength.pop(source, None)
+    candidates = [(c, n) for c, n in strength.most_common() if not graph.has_edge(source, c)][:limit]
+    return BoundedRecommendations(candidates, truncated, expanded)
+
+
+def personalized_pagerank(graph: FollowGraph, source: int, damping: float = 0.85, tol: float = 1e-6, max_iter: int = 50) -> dict[int, float]:
+    """Random walk with restart from `source`, by power iteration over the CSR matrix.
+
+    Each step the walker follows a random FOLLOWS edge with probability
+    `damping` and jumps back to `source` otherwise. Dangling users (who
+    follow nobody) also send their mass back to `source`. Only users with
+    non-zero mass are expanded, so the cost tracks the reachable neighborhood
+    rather than the whole graph.
+    """
+    rank = {source: 1.0}
+    for _ in range(max_iter):
+        nxt: dict[int, float] = {source: 1.0 - damping}
+        for u, mass in rank.items():
+            row = graph.followees(u)
+            if not row:
+                nxt[source] += damping * mass
+                continue
+            share = damping * mass / len(row)
+            for v in row:
+                nxt[v] = nxt.get(v, 0.0) + share
+
+        delta = sum(abs(nxt.get(u, 0.0) - r) for u, r in rank.items())
+        delta += sum(r for u, r in nxt.items() if u not in rank)
+        rank = nxt
+        if delta < tol:
+            break
+    return rank
+
+
+def monte_carlo_ppr(graph: FollowGraph, source: int, damping: float = 0.85, num_walks: int = 5000, time_budget: float = 0.05, seed: Optional[int] = None) -> dict[int, float]:
+    """Estimate personalized PageRank from `source` with random walks.
+
+    Walks stop early once `time_budget` seconds have elapsed; the estimate is
+    normalized by the number of walks actually completed.
+    """
+    rng = random.Random(seed)
+    visits: Counter = Counter()
+    deadline = time.perf_counter() + time_budget
+    walks = 0
+    while walks < num_walks:
+        # check the clock every 64 walks to keep the overhead negligible
+        if walks % 64 == 0 and time.perf_counter() > deadline:
+            break
+        u = source
+        while True:
+            visits[u] += 1
+            row = graph.followees(u)
+            if not row or rng.random() >= damping:
+                break
+            u = row[rng.randrange(len(row))]
+        walks += 1
+
+    total = sum(visits.values())
+    if not total:
+        return {source: 1.0}
+    return {u: count / total for u, count in visits.items()}
+
+
+def top_candidates(graph: FollowGraph, source: int, scores: dict[int, float], limit: int = 5) -> list[tuple[int, float]]:
+    """Highest-scoring users that are not `source` and not already followed by it."""
+    ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+    result = []
+    for u, score in ranked:
+        if u == source or graph.has_edge(source, u):
+            continue
+        result.append((u, score))
+        if len(result) >= limit:
+            break
+    return result
+
+
+def pagerank(graph: FollowGraph, damping: float = 0.85, tol: float = 1e-8, max_iter: int = 100, initial: Optional[list[float]] = None) -> tuple[list[float], int]:
+    """Global PageRank by power iteration; returns (scores, iterations run).
+
+    Scores sum to 1. Passing the previous scores as `initial` warm-starts the
+    iteration, so after a small edge delta it converges in a few rounds.
+    Dangling mass is spread uniformly.
+    """
+    n = graph.num_users
+    if n == 0:
+        return [], 0
+    # users added since `initial` was computed start from the uniform score
+    rank = list(initial or [])[:n]
+    rank += [1.0 / n] * (n - len(rank))
+    total = sum(rank)
+    rank = [r / total for r in rank]
+
+    iterations = 0
+    for iterations in range(1, max_iter + 1):
+        dangling = 0.0
+        nxt = [0.0] * n
+        for u in range(n):
+            row = graph.followees(u)
+            if not row:
+                dangling += rank[u]
+                continue
+            share = rank[u] / len(row)
+            for v in row:
+                nxt[v] += share
+        base = (1.0 - damping) / n + damping * dangling / n
+        nxt = [base + damping * x for x in nxt]
+        delta = sum(abs(a - b) for a, b in zip(nxt, rank))
+        rank = nxt
+        if delta < tol:
+            break
+    return rank, iterations
+
+
+def weakly_connected_components(graph: FollowGraph) -> list[int]:
+    """Label every user with a component id, ignoring edge direction.
+
+    The id is that of the component's member with the smallest username.
+    User ids are process-local (they follow load order), but
+    `graph.usernames[label]` is the same across runs on the same graph.
+    """
+    names = graph.usernames
+    parent = list(range(graph.num_users))
+
+    def find(x: int) -> int:
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for u in range(graph.num_users):
+        for v in graph.followees(u):
+            ru, rv = find(u), find(v)
+            if ru != rv:
+                # keep the smaller username as the root
+                if names[ru] < names[rv]:
+                    parent[rv] = ru
+                else:
+                    parent[ru] = rv
+    return [find(u) for u in range(graph.num_users)]
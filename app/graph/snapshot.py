@@ -0,0 +1,164 @@
+"""Compact binary snapshot of the users and the FOLLOWS graph.
+
+One file, laid out so it can be memory-mapped and used without parsing:
+
+    header      magic, format version, user/edge/string counts, section sizes
+    usernames   NUL-separated UTF-8, one per user (user id order)
+    strings     NUL-separated UTF-8 table of interned profile strings
+    userId, name, email, bio
+                int32 column per field, indexing into the string table (-1 = None)
+    out_offsets int64[n + 1], out_targets int32[m]   followees, CSR
+    in_offsets  int64[n + 1], in_targets  int32[m]   followers, CSR
+
+Every section starts on an 8-byte boundary. Password hashes are never
+written. Loading casts the mmap'd sections to typed memoryviews, so the CSR
+arrays are not copied at all; only the usernames are decoded, in one pass.
+"""
+import csv
+import mmap
+import struct
+from array import array
+from typing import Iterable, Optional
+
+from graph.follow_graph import FollowGraph
+
+MAGIC = b"BBSNAP\x00\x01"
+FORMAT_VERSION = 1
+PROFILE_COLUMNS = ("userId", "name", "email", "bio")
+_SECTIONS = ("usernames", "strings") + PROFILE_COLUMNS + ("out_offsets", "out_targets", "in_offsets", "in_targets")
+# magic, format version, num_users, num_edges, num_strings, then one byte length per section
+_HEADER = struct.Struct("<8sIqqq" + "q" * len(_SECTIONS))
+
+
+def _pad(length: int) -> int:
+    return (8 - length % 8) % 8
+
+
+def write_snapshot(path: str, graph: FollowGraph, profiles: Optional[dict[str, dict]] = None):
+    """Write `graph` (plus optional username -> profile dicts) to `path`."""
+    graph.compact()
+    n = graph.num_users
+
+    strings: dict[str, int] = {}
+    columns = {name: array("i", [-1]) * n for name in PROFILE_COLUMNS}
+    for username, profile in (profiles or {}).items():
+        u = graph.index_of(username)
+        if u is None:
+            continue
+        for name in PROFILE_COLUMNS:
+            value = profile.get(name)
+            if value is not None:
+                columns[name][u] = strings.setdefault(str(value), len(strings))
+
+    sections = {
+        "usernames": memoryview("\0".join(graph.usernames).encode("utf-8")),
+        "strings": memoryview("\0".join(strings).encode("utf-8")),
+        **{name: memoryview(columns[name]) for name in PROFILE_COLUMNS},
+        "out_offsets": graph.out_offsets,
+        "out_targets": graph.out_targets,
+        "in_offsets": graph.in_offsets,
+        "in_targets": graph.in_targets,
+    }
+    sizes = [sections[name].nbytes for name in _SECTIONS]
+    header = _HEADER.pack(MAGIC, FORMAT_VERSION, n, graph.num_edges, len(strings), *sizes)
+    with open(path, "wb") as f:
+        f.write(header)
+        f.write(b"\0" * _pad(len(header)))
+        for name, size in zip(_SECTIONS, sizes):
+            f.write(sections[name])
+            f.write(b"\0" * _pad(size))
+
+
+def export_from_csv(users_path: str, connections_path: str, path: str):
+    """Convert the `data/` CSV files into a snapshot."""
+    with open(users_path, "r", encoding="utf-8") as f:
+        profiles = {row["username"]: row for row in csv.DictReader(f)}
+    with open(connections_path, "r", encoding="utf-8") as f:
+        edges = [(row["follower_username"], row["followee_username"]) for row in csv.DictReader(f)]
+    write_snapshot(path, FollowGraph.from_edges(profiles, edges), profiles)
+
+
+def export_from_crud(crud, path: str):
+    """Dump the users and FOLLOWS graph from Neo4j into a snapshot."""
+    profiles = {row["username"]: row for row in crud.get_all_users()}
+    write_snapshot(path, FollowGraph.from_edges(profiles, crud.get_all_follow_edges()), profiles)
+
+
+class GraphSnapshot:
+    """A memory-mapped snapshot file. Keep it open while its graph is in use."""
+
+    def __init__(self, path: str):
+        self._file = open(path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._mmap)
+
+        magic, version, self.num_users, self.num_edges, self.num_strings, *lengths = _HEADER.unpack_from(view)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"{path} is not a buddy-bloom snapshot (version {FORMAT_VERSION})")
+
+        pos = _HEADER.size + _pad(_HEADER.size)
+        self._sections = {}
+        for name, length in zip(_SECTIONS, lengths):
+            self._sections[name] = view[pos:pos + length]
+            pos += length + _pad(length)
+
+        self._columns = {name: self._sections[name].cast("i") for name in PROFILE_COLUMNS}
+        self.usernames = self._split(self._sections["usernames"], self.num_users)
+        self._strings: Optional[list[str]] = None
+
+    @staticmethod
+    def _split(blob: memoryview, count: int) -> list[str]:
+        if count == 0:
+            return []
+        return str(blob, "utf-8").split("\0")
+
+    def to_graph(self) -> FollowGraph:
+        """Build a FollowGraph whose CSR arrays point straight into the mmap."""
+        s = self._sections
+        return FollowGraph(
+            self.usernames,
+            s["out_offsets"].cast("q"),
+            s["out_targets"].cast("i"),
+            s["in_offsets"].cast("q"),
+            s["in_targets"].cast("i"),
+        )
+
+    def profile(self, u: int) -> dict:
+        """Profile fields of user id `u` (decodes the string table on first call)."""
+        if self._strings is None:
+            self._strings = self._split(self._sections["strings"], self.num_strings)
+        data = {"username": self.usernames[u]}
+        for name in PROFILE_COLUMNS:
+            idx = self._columns[name][u]
+            data[name] = self._strings[idx] if idx >= 0 else None
+        return data
+
+    def profiles(self) -> Iterable[dict]:
+        for u in range(self.num_users):
+            yield self.profile(u)
+
+    def close(self):
+        """Unmap the file. Fails with BufferError while a graph from `to_graph` is alive."""
+        for view in list(self._columns.values()) + list(self._sections.values()):
+            view.release()
+        self._mmap.close()
+        self._file.close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Export a binary graph snapshot.")
+    parser.add_argument("source", choices=("csv", "neo4j"))
+    parser.add_argument("output")
+    parser.add_argument("--users", default="../data/users.csv")
+    parser.add_argument("--connections", default="../data/connections.csv")
+    args = parser.parse_args()
+
+    if args.source == "csv":
+        export_from_csv(args.users, args.connections, args.output)
+    else:
+        from database import UserCRUD, NEO4J_URI, NEO4J_USERNAME, NEO4J_PASSWORD
+        export_from_crud(UserCRUD(NEO4J_URI, NEO4J_USERNAME, NEO4J_PASSWORD), args.output)
+    snapshot = GraphSnapshot(args.output)
+    print(f"Wrote {args.output}: {snapshot.num_users} users, {snapshot.num_edges} edges.")
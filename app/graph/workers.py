@@ -0,0 +1,262 @@
+"""Hash-partitioned pool of graph query worker processes.
+
+Every worker memory-maps the same snapshot file, so the read-only CSR
+adjacency lives once in shared memory (the page cache) no matter how many
+workers run. Users are partitioned by a stable hash of their username:
+requests about one user's neighborhood are routed to that user's partition,
+and whole-graph queries (`search_users`, `get_popular_users`) are scattered
+to every partition, each scanning only the users it owns, and gathered.
+
+Workers answer from the snapshot they started with; follows made afterwards
+are not visible until the pool is restarted from a fresh snapshot. If a
+worker fails to start or dies, requests for its partition fail with
+RuntimeError instead of waiting forever.
+"""
+import heapq
+import itertools
+import multiprocessing as mp
+import os
+import queue
+import tempfile
+import threading
+import zlib
+from concurrent.futures import Future
+from typing import Optional
+
+from graph.follow_graph import FollowGraph
+from graph.ranking import friends_of_friends, personalized_pagerank, top_candidates
+from graph.snapshot import GraphSnapshot, export_from_crud, write_snapshot
+
+
+def partition_of(username: str, num_partitions: int) -> int:
+    """Stable (process-independent) partition for `username`."""
+    return zlib.crc32(username.encode("utf-8")) % num_partitions
+
+
+class _PartitionWorker:
+    """Query handlers run inside one worker process."""
+
+    def __init__(self, path: str, partition: int, num_partitions: int):
+        self.snapshot = GraphSnapshot(path)
+        self.graph = self.snapshot.to_graph()
+        self.owned = [
+            u for u, name in enumerate(self.graph.usernames)
+            if partition_of(name, num_partitions) == partition
+        ]
+        self._search_keys: Optional[list[tuple[int, str, str]]] = None
+
+    def recommend(self, username: str, mode: str = "fof", limit: int = 5) -> list[tuple[str, float]]:
+        source = self.graph.index_of(username)
+        if source is None:
+            return []
+        if mode == "ppr":
+            scores = personalized_pagerank(self.graph, source)
+        else:
+            scores = friends_of_friends(self.graph, source)
+        return [(self.graph.usernames[u], score) for u, score in top_candidates(self.graph, source, scores, limit)]
+
+    def mutuals(self, username1: str, username2: str) -> list[str]:
+        a = self.graph.index_of(username1)
+        b = self.graph.index_of(username2)
+        if a is None or b is None:
+            return []
+        common = set(self.graph.followees(a)).intersection(self.graph.followees(b))
+        return sorted(self.graph.usernames[u] for u in common)
+
+    def search_users(self, term: str, limit: int = 20) -> list[tuple[str, Optional[str]]]:
+        if self._search_keys is None:
+            self._search_keys = []
+            for u in self.owned:
+                name = self.snapshot.profile(u)["name"] or ""
+                self._search_keys.append((u, self.graph.usernames[u].lower(), name.lower()))
+        term = term.lower()
+        matches = []
+        for u, username, name in self._search_keys:
+            if term in username or term in name:
+                matches.append((self.graph.usernames[u], self.snapshot.profile(u)["name"]))
+                if len(matches) >= limit:
+                    break
+        return matches
+
+    def get_popular_users(self, limit: int = 10) -> list[tuple[str, int]]:
+        top = heapq.nlargest(limit, self.owned, key=self.graph.in_degree)
+        return [(self.graph.usernames[u], self.graph.in_degree(u)) for u in top]
+
+
+def _serve(path: str, partition: int, num_partitions: int, requests, responses):
+    try:
+        worker = _PartitionWorker(path, partition, num_partitions)
+    except Exception as e:
+        # request id None tells the pool this partition is unusable
+        responses.put((None, f"{type(e).__name__}: {e}", partition))
+        return
+    while True:
+        message = requests.get()
+        if message is None:
+            break
+        request_id, op, args = message
+        try:
+            responses.put((request_id, None, getattr(worker, op)(*args)))
+        except Exception as e:
+            responses.put((request_id, f"{type(e).__name__}: {e}", None))
+
+
+class GraphWorkerPool:
+    """Routes graph reads to worker processes sharing one mmap'd snapshot.
+
+    Safe to call from several threads; `submit` returns a Future so a single
+    caller can also keep many requests in flight.
+    """
+
+    # seconds between liveness checks of the workers while waiting for responses
+    poll_interval = 0.5
+
+    def __init__(self, snapshot_path: str, num_workers: Optional[int] = None):
+        self.num_workers = num_workers or os.cpu_count() or 1
+        self._owned_path: Optional[str] = None
+        ctx = mp.get_context()
+        self._responses = ctx.Queue()
+        self._requests = [ctx.Queue() for _ in range(self.num_workers)]
+        self._processes = [
+            ctx.Process(target=_serve, args=(snapshot_path, p, self.num_workers, self._requests[p], self._responses), daemon=True)
+            for p in range(self.num_workers)
+        ]
+        for process in self._processes:
+            process.start()
+
+        # request id -> (partition, future)
+        self._pending: dict[int, tuple[int, Future]] = {}
+        # partition -> reason its worker is gone
+        self._dead: dict[int, str] = {}
+        self._lock = threading.Lock()
+        self._ids = itertools.count()
+        self._collector = threading.Thread(target=self._collect, daemon=True)
+        self._collector.start()
+
+    @classmethod
+    def from_graph(cls, graph: FollowGraph, num_workers: Optional[int] = None, profiles: Optional[dict[str, dict]] = None) -> "GraphWorkerPool":
+        """Start a pool over `graph`, staging its snapshot in /dev/shm when available.
+
+        Without `profiles` (username -> {name, ...}) `search_users` can only
+        match usernames.
+        """
+        path = cls._staging_path()
+        write_snapshot(path, graph, profiles)
+        return cls._owning(path, num_workers)
+
+    @classmethod
+    def from_crud(cls, crud, num_workers: Optional[int] = None) -> "GraphWorkerPool":
+        """Start a pool over the users, profiles and FOLLOWS edges currently in Neo4j."""
+        path = cls._staging_path()
+        export_from_crud(crud, path)
+        return cls._owning(path, num_workers)
+
+    @staticmethod
+    def _staging_path() -> str:
+        directory = "/dev/shm" if os.path.isdir("/dev/shm") else None
+        fd, path = tempfile.mkstemp(suffix=".bbsnap", dir=directory)
+        os.close(fd)
+        return path
+
+    @classmethod
+    def _owning(cls, path: str, num_workers: Optional[int]) -> "GraphWorkerPool":
+        # the pool deletes its staged snapshot on close
+        pool = cls(path, num_workers)
+        pool._owned_path = path
+        return pool
+
+    def partition_of(self, username: str) -> int:
+        return partition_of(username, self.num_workers)
+
+    def submit(self, partition: int, op: str, *args) -> Future:
+        """Send `op(*args)` to one partition's worker."""
+        future: Future = Future()
+        with self._lock:
+            if partition in self._dead:
+                future.set_exception(RuntimeError(self._dead[partition]))
+                return future
+            request_id = next(self._ids)
+            self._pending[request_id] = (partition, future)
+        self._requests[partition].put((request_id, op, args))
+        return future
+
+    def _collect(self):
+        while True:
+            try:
+                message = self._responses.get(timeout=self.poll_interval)
+            except queue.Empty:
+                self._check_workers()
+                continue
+            if message is None:
+                break
+            request_id, error, result = message
+            if request_id is None:
+                self._fail_partition(result, f"graph worker {result} failed to start: {error}")
+                continue
+            with self._lock:
+                pending = self._pending.pop(request_id, None)
+            if pending is None:
+                continue
+            if error:
+                pending[1].set_exception(RuntimeError(error))
+            else:
+                pending[1].set_result(result)
+
+    def _check_workers(self):
+        for partition, process in enumerate(self._processes):
+            if partition not in self._dead and process.exitcode is not None:
+                self._fail_partition(partition, f"graph worker {partition} exited with code {process.exitcode}")
+
+    def _fail_partition(self, partition: int, reason: str):
+        """Mark `partition` unusable and fail every request still waiting on it."""
+        with self._lock:
+            self._dead[partition] = reason
+            failed = [rid for rid, (p, _) in self._pending.items() if p == partition]
+            futures = [self._pending.pop(rid)[1] for rid in failed]
+        for future in futures:
+            future.set_exception(RuntimeError(reason))
+
+    def recommend(self, username: str, mode: str = "fof", limit: int = 5) -> list[tuple[str, float]]:
+        """(username, score) recommendations, computed on `username`'s partition."""
+        return self.submit(self.partition_of(username), "recommend", username, mode, limit).result()
+
+    def mutuals(self, username1: str, username2: str) -> list[str]:
+        return self.submit(self.partition_of(username1), "mutuals", username1, username2).result()
+
+    def search_users(self, term: str, limit: int = 20) -> list[tuple[str, Optional[str]]]:
+        """(username, name) of users matching `term`, gathered from every partition."""
+        futures = [self.submit(p, "search_users", term, limit) for p in range(self.num_workers)]
+        matches = [match for future in futures for match in future.result()]
+        return sorted(matches)[:limit]
+
+    def get_popular_users(self, limit: int = 10) -> list[tuple[str, int]]:
+        """(username, follower count) of the most-followed users across all partitions."""
+        futures = [self.submit(p, "get_popular_users", limit) for p in range(self.num_workers)]
+        candidates = [user for future in futures for user in future.result()]
+        return heapq.nlargest(limit, candidates, key=lambda user: user[1])
+
+    def close(self):
+        # later submits fail at once instead of queueing behind the shutdown
+        with self._lock:
+            for partition in range(self.num_workers):
+                self._dead.setdefault(partition, "graph worker pool is closed")
+        for requests in self._requests:
+            requests.put(None)
+        for process in self._processes:
+            process.join()
+        self._responses.put(None)
+        self._collector.join()
+        with self._lock:
+            leftover = [future for _, future in self._pending.values()]
+            self._pending.clear()
+        for future in leftover:
+            future.set_exception(RuntimeError("graph worker pool is closed"))
+        if self._owned_path:
+            os.remove(self._owned_path)
+            self._owned_path = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
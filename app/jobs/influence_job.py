@@ -0,0 +1,123 @@
+"""Batch job computing global influence scores over the FOLLOWS graph.
+
+Computes PageRank and weakly connected components on the in-process graph
+and writes them back to the `:User` nodes as `influenceScore` and
+`componentId`, which `UserCRUD.get_popular_users(by_influence=True)` ranks by.
+
+Run from the `app/` directory:  python -m jobs.influence_job
+"""
+import time
+from typing import Iterable, Optional
+
+from changelog import ChangeLog, edge_deltas
+from database import UserCRUD, NEO4J_URI, NEO4J_USERNAME, NEO4J_PASSWORD
+from graph.follow_graph import FollowGraph
+from graph.ranking import pagerank, weakly_connected_components
+
+
+class InfluenceJob:
+    """Computes influence scores and keeps them current after edge deltas."""
+
+    def __init__(self, crud: UserCRUD, graph: Optional[FollowGraph] = None, batch_size: int = 1000, damping: float = 0.85, tol: float = 1e-8, min_change: float = 0.01):
+        self.crud = crud
+        self.graph = graph
+        self.batch_size = batch_size
+        self.damping = damping
+        # PageRank convergence tolerance (L1 change between iterations)
+        self.tol = tol
+        # after a delta, a score is written back only if it moved by more than
+        # this fraction of the value last written (and by more than `tol`)
+        self.min_change = min_change
+        self.scores: list[float] = []
+        self.components: list[int] = []
+        # values as last written to the DB; compared against so that small
+        # moves below the threshold still add up to a write eventually
+        self._written_scores: list[float] = []
+        self._written_components: list[int] = []
+
+    def run(self) -> dict:
+        """Full recomputation; writes every user's score and component."""
+        start = time.perf_counter()
+        if self.graph is None:
+            self.graph = FollowGraph.from_crud(self.crud)
+
+        self.scores, iterations = pagerank(self.graph, damping=self.damping, tol=self.tol)
+        self.components = weakly_connected_components(self.graph)
+        written = self._write(range(self.graph.num_users))
+        return self._stats(start, iterations, written)
+
+    def apply_deltas(self, added: Iterable[tuple[str, str]] = (), removed: Iterable[tuple[str, str]] = ()) -> dict:
+        """Apply FOLLOWS edge changes and write back only the users whose values moved.
+
+        PageRank is still recomputed over the whole graph, warm-started from
+        the previous scores. What stays small is the write-back: only users
+        whose score changed by more than `min_change` (relative) or whose
+        component changed are written, so one new edge touches a handful
+        of nodes instead of all of them.
+        """
+        if self.graph is None or not self.scores:
+            return self.run()
+        start = time.perf_counter()
+        changed = False
+        for follower, followee in added:
+            changed |= self.graph.add_edge(follower, followee)
+        for follower, followee in removed:
+            changed |= self.graph.remove_edge(follower, followee)
+        if not changed:
+            return self._stats(start, 0, 0)
+
+        self.scores, iterations = pagerank(self.graph, damping=self.damping, tol=self.tol, initial=self.scores)
+        self.components = weakly_connected_components(self.graph)
+        old_scores, old_components = self._written_scores, self._written_components
+        dirty = [
+            u for u in range(self.graph.num_users)
+            if u >= len(old_scores)
+            or abs(self.scores[u] - old_scores[u]) > max(self.min_change * old_scores[u], self.tol)
+            or self.components[u] != old_components[u]
+        ]
+        written = self._write(dirty)
+        return self._stats(start, iterations, written)
+
+    def catch_up(self, changelog: ChangeLog, from_offset: int) -> tuple[int, dict]:
+        """Apply the FOLLOWS changes logged since `from_offset`.
+
+        Returns (offset to resume from next time, stats).
+        """
+        end = changelog.end_offset
+        added, removed = edge_deltas(changelog.replay(from_offset, end))
+        return end, self.apply_deltas(added, removed)
+
+    def _write(self, users: Iterable[int]) -> int:
+        users = list(users)
+        rows = [
+            # label components by username so componentId is stable across runs
+            {"username": self.graph.usernames[u], "score": self.scores[u], "component": self.graph.usernames[self.components[u]]}
+            for u in users
+        ]
+        for i in range(0, len(rows), self.batch_size):
+            self.crud.write_influence_scores(rows[i:i + self.batch_size])
+
+        n = self.graph.num_users
+        self._written_scores += [0.0] * (n - len(self._written_scores))
+        self._written_components += [-1] * (n - len(self._written_components))
+        for u in users:
+            self._written_scores[u] = self.scores[u]
+            self._written_components[u] = self.components[u]
+        return len(rows)
+
+    def _stats(self, start: float, iterations: int, written: int) -> dict:
+        return {
+            "users": self.graph.num_users,
+            "edges": self.graph.num_edges,
+            "components": len(set(self.components)),
+            "iterations": iterations,
+            "written": written,
+            "seconds": round(time.perf_counter() - start, 3),
+        }
+
+
+if __name__ == "__main__":
+    crud = UserCRUD(NEO4J_URI, NEO4J_USERNAME, NEO4J_PASSWORD)
+    stats = InfluenceJob(crud).run()
+    print(f"Influence job finished: {stats}")
+    crud.driver.close()
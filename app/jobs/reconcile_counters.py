@@ -0,0 +1,96 @@
+"""Batch job reconciling the denormalized followersCount/followingCount.
+
+Scans users in keyset batches (by username), compares the stored counters
+with the real FOLLOWS degree, and repairs only the drifted users, one
+bounded write transaction per batch. Safe to run online: scans are
+read-only, and each repair locks a node before recounting it. A batch
+whose repair still fails after the driver's retries is skipped (and
+counted in `failedBatches`) for the next run to pick up.
+
+Run from the `app/` directory:  python -m jobs.reconcile_counters [--dry-run]
+"""
+import argparse
+import time
+
+from neo4j.exceptions import Neo4jError
+
+from database import UserCRUD, NEO4J_URI, NEO4J_USERNAME, NEO4J_PASSWORD
+
+
+class CounterReconciliationJob:
+    """Finds and repairs counter drift; `run()` returns drift statistics."""
+
+    def __init__(self, crud: UserCRUD, batch_size: int = 500, pause: float = 0.0, dry_run: bool = False):
+        self.crud = crud
+        self.batch_size = batch_size
+        # seconds to sleep between batches, to leave headroom for live traffic
+        self.pause = pause
+        self.dry_run = dry_run
+
+    def run(self) -> dict:
+        start = time.perf_counter()
+        stats = {
+            "scanned": 0,
+            "drifted": 0,
+            "repaired": 0,
+            "followersDrift": 0,
+            "followingDrift": 0,
+            "maxDrift": 0,
+            "batches": 0,
+            "failedBatches": 0,
+            "examples": [],
+        }
+        after = None
+        while True:
+            rows = self.crud.scan_counter_drift(after=after, batch_size=self.batch_size)
+            if not rows:
+                break
+            after = rows[-1]["username"]
+            stats["scanned"] += len(rows)
+            stats["batches"] += 1
+
+            drifted = []
+            for row in rows:
+                followers_drift = (row["storedFollowers"] or 0) - row["followers"]
+                following_drift = (row["storedFollowing"] or 0) - row["following"]
+                if followers_drift or following_drift or row["storedFollowers"] is None or row["storedFollowing"] is None:
+                    drifted.append(row["username"])
+                    stats["followersDrift"] += abs(followers_drift)
+                    stats["followingDrift"] += abs(following_drift)
+                    stats["maxDrift"] = max(stats["maxDrift"], abs(followers_drift), abs(following_drift))
+                    if len(stats["examples"]) < 10:
+                        stats["examples"].append((row["username"], followers_drift, following_drift))
+            stats["drifted"] += len(drifted)
+
+            if drifted and not self.dry_run:
+                try:
+                    stats["repaired"] += self.crud.repair_counters(drifted)
+                except Neo4jError as e:
+                    stats["failedBatches"] += 1
+                    print(f"Warning: skipped repairing {len(drifted)} users from {drifted[0]!r}: {e}")
+            if len(rows) < self.batch_size:
+                break
+            if self.pause:
+                time.sleep(self.pause)
+
+        stats["seconds"] = round(time.perf_counter() - start, 3)
+        return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reconcile follower/following counters.")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--pause", type=float, default=0.0)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    crud = UserCRUD(NEO4J_URI, NEO4J_USERNAME, NEO4J_PASSWORD)
+    stats = CounterReconciliationJob(crud, args.batch_size, args.pause, args.dry_run).run()
+    print(f"Scanned {stats['scanned']} users in {stats['batches']} batches ({stats['seconds']}s).")
+    print(f"Drifted: {stats['drifted']}  repaired: {stats['repaired']}  max drift: {stats['maxDrift']}")
+    if stats["failedBatches"]:
+        print(f"Skipped {stats['failedBatches']} batches whose repair failed; run again to retry them.")
+    print(f"Total |drift|: followers {stats['followersDrift']}, following {stats['followingDrift']}")
+    for username, followers_drift, following_drift in stats["examples"]:
+        print(f"  {username}: followers {followers_drift:+d}, following {following_drift:+d}")
+    crud.driver.close()
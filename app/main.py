@@ -1,10 +1,14 @@
 import sys
 import uuid
 import getpass
+import itertools
 from typing import Optional
 
-from database import UserCRUD, NEO4J_URI, NEO4J_USERNAME, NEO4J_PASSWORD
-from services.user_service import UserService
+from neo4j.exceptions import AuthError, ServiceUnavailable
+
+from database import UserCRUD, NEO4J_URI, NEO4J_USERNAME, NEO4J_PASSWORD, CHANGELOG_PATH, USERNAME_FILTER_FPR, USERNAME_FILTER_TTL, GRAPH_WORKERS, GRAPH_WORKERS_REFRESH
+from changelog import ChangeLog
+from services.user_service import UserService, RECOMMENDATION_MODES, PATH_BACKENDS
 from repository.user_repository import UserRepository
 from models import User
 
@@ -21,6 +25,27 @@ def display_profile(user: User):
     print(f"  Following: {user.followingCount}")
     print("----------------------\n")
 
+def page_users(users, title: str, empty_message: str, page_size: int = 20):
+    """Print users from a lazy iterator one screen at a time."""
+    first = True
+    while True:
+        page = list(itertools.islice(users, page_size))
+        if not page:
+            if first:
+                print(empty_message)
+            break
+        if first:
+            print(f"\n--- {title} ---")
+            first = False
+        for u in page:
+            print(f" - {u.username} ({u.name}) — followers:{u.followersCount} following:{u.followingCount}")
+        if len(page) < page_size:
+            break
+        if input("Press Enter for more, or q to stop: ").strip().lower() == "q":
+            break
+    if not first:
+        print("-----------------")
+
 def edit_profile_flow(service: UserService, current_user: User) -> Optional[User]:
     print("\n--- Edit Profile ---")
     print(f"Current Name: {current_user.name}")
@@ -87,6 +112,8 @@ def logged_in_menu(service: UserService, current_user: User):
         print("9) Search Users")
         print("10) Explore Popular Users")
         print("11) Logout")
+        print("12) Delete Account")
+        print("13) How Am I Connected?")
         choice = input("Choose an option: ").strip()
 
         if choice == "1":
@@ -117,30 +144,18 @@ def logged_in_menu(service: UserService, current_user: User):
                     current_user = service.repo.get_by_username(current_user.username)
 
         elif choice == "5":
-            success, followers, msg = service.get_followers(current_user)
+            success, followers, msg = service.iter_followers(current_user, page_size=20)
             if not success:
                 print(msg)
             else:
-                if not followers:
-                    print("No followers found.")
-                else:
-                    print("\n--- Followers ---")
-                    for u in followers:
-                        print(f" - {u.username} ({u.name}) — followers:{u.followersCount} following:{u.followingCount}")
-                    print("-----------------")
+                page_users(followers, "Followers", "No followers found.")
 
         elif choice == "6":
-            success, following, msg = service.get_following(current_user)
+            success, following, msg = service.iter_following(current_user, page_size=20)
             if not success:
                 print(msg)
             else:
-                if not following:
-                    print('Not following anyone.')
-                else:
-                    print("\n--- Following ---")
-                    for u in following:
-                        print(f" - {u.username} ({u.name}) — followers:{u.followersCount} following:{u.followingCount}")
-                    print("-----------------")
+                page_users(following, "Following", "Not following anyone.")
 
         elif choice == "7":
             target = input("See mutuals with (username): ").strip()
@@ -154,8 +169,16 @@ def logged_in_menu(service: UserService, current_user: User):
                 print("-------------------------")
 
         elif choice == "8":
-            recs = service.get_recommendations(current_user)
-            print(f"\n--- Recommended for you ---")
+            mode = input("Mode - fof, fof-index, fof-bounded, ppr or ppr-mc (press Enter for fof): ").strip() or "fof"
+            if mode not in RECOMMENDATION_MODES:
+                print(f"Unknown mode '{mode}'.")
+                continue
+            truncated = False
+            if mode == "fof-bounded":
+                recs, truncated = service.get_bounded_recommendations(current_user)
+            else:
+                recs = service.get_recommendations(current_user, mode=mode)
+            print(f"\n--- Recommended for you{' (partial results)' if truncated else ''} ---")
             if not recs:
                 print("No recommendations available (try following more people!).")
             else:
@@ -178,21 +201,53 @@ def logged_in_menu(service: UserService, current_user: User):
                 print("-----------------------------------")
 
         elif choice == "10":
-            pop_users = service.get_popular_users()
+            rank_by = input("Rank by followers or influence (press Enter for followers): ").strip() or "followers"
+            if rank_by not in ("followers", "influence"):
+                print(f"Unknown ranking '{rank_by}'.")
+                continue
+            pop_users = service.get_popular_users(rank_by=rank_by)
             print(f"\n--- Top 10 Popular Users ---")
             if not pop_users:
                 print("No users found.")
             else:
                 for rank, u in enumerate(pop_users, 1):
-                    print(f"  #{rank} {u.username} ({u.followersCount} followers)")
+                    if rank_by == "influence":
+                        print(f"  #{rank} {u.username} (influence {u.influenceScore:.6f}, {u.followersCount} followers)")
+                    else:
+                        print(f"  #{rank} {u.username} ({u.followersCount} followers)")
             print("----------------------------")
 
         elif choice == "11":
             print("Logged out successfully.")
             return None
 
+        elif choice == "12":
+            confirm = input(f"Type your username ({current_user.username}) to confirm deletion: ").strip()
+            if confirm != current_user.username:
+                print("Deletion cancelled.")
+            else:
+                password = getpass.getpass("Password: ")
+                success, message = service.delete_account(current_user, password)
+                print(message)
+                if success:
+                    return None
+
+        elif choice == "13":
+            target = input("Find your connection to (username): ").strip()
+            backend = input("Search graph or db (press Enter for graph): ").strip() or "graph"
+            if not target:
+                print("Username required.")
+            elif backend not in PATH_BACKENDS:
+                print(f"Unknown backend '{backend}'.")
+            else:
+                path, msg = service.get_connection_path(current_user, target, backend=backend)
+                print(f"\n--- {msg} ---")
+                if path:
+                    print("  " + " -> ".join(u.username for u in path))
+                print("-------------------------")
+
         else:
-            print("Invalid choice. Please select 1-11.")
+            print("Invalid choice. Please select 1-13.")
             
         # Ensure the menu uses the potentially updated current_user for the next iteration
         if current_user is None:
@@ -200,67 +255,72 @@ def logged_in_menu(service: UserService, current_user: User):
 
 def main():
     """Main entry point for Buddy-Bloom application"""
-    try:
-        crud = UserCRUD(NEO4J_URI, NEO4J_USERNAME, NEO4J_PASSWORD)
-    except Exception as e:
-        print(f"✗ Error connecting to database: {e}")
-        sys.exit(1)
+    # the driver connects on the first query (see UserCRUD.driver), so
+    # connection errors are handled around the console loop below
+    changelog = ChangeLog(CHANGELOG_PATH) if CHANGELOG_PATH else None
+    crud = UserCRUD(NEO4J_URI, NEO4J_USERNAME, NEO4J_PASSWORD, changelog=changelog)
 
     # wire repository and service
-    repository = UserRepository(crud)
+    repository = UserRepository(crud, username_filter_fpr=USERNAME_FILTER_FPR, graph_workers=GRAPH_WORKERS, username_filter_ttl=USERNAME_FILTER_TTL, graph_workers_refresh=GRAPH_WORKERS_REFRESH)
     service = UserService(repository)
 
     current_user: Optional[User] = None
 
-    print("\n=== Buddy-Bloom Console: Signup / Login ===\n")
-    while True:
-        if current_user:
-            # If logged in, pass control to the logged_in_menu
-            current_user = logged_in_menu(service, current_user)
-            continue
-
-        print("1) Signup")
-        print("2) Login")
-        print("3) Exit")
-        choice = input("Choose an option: ").strip()
-        if choice == "1":
-            # Signup flow using service
-            username = input("Choose username: ").strip()
-            email = input("Email: ").strip()
-            name = input("Full name: ").strip()
-            bio = input("Bio: ").strip()
-            if not username or not email or not name or not bio:
-                print("username, email, name and bio are required")
-                continue
-            password = getpass.getpass("Choose password: ")
-            confirm = getpass.getpass("Confirm password: ")
-            if password != confirm:
-                print("Passwords do not match.")
+    try:
+        print("\n=== Buddy-Bloom Console: Signup / Login ===\n")
+        while True:
+            if current_user:
+                # If logged in, pass control to the logged_in_menu
+                current_user = logged_in_menu(service, current_user)
                 continue
-            created = service.register(username, email, bio, name, password)
-            if created:
-                print(f"User created: {created.username} (userId={created.userId})")
-            else:
-                print("Failed to create user (may already exist)")
 
-        elif choice == "2":
-            username = input("Username: ").strip()
-            if not username:
-                print("Username required.")
-                continue
-            password = getpass.getpass("Password: ")
-            user = service.authenticate(username, password)
-            if user:
-                print(f"Login successful. Welcome, {user.name} (userId={user.userId})")
-                current_user = user
-            else:
-                print("Invalid credentials.")
+            print("1) Signup")
+            print("2) Login")
+            print("3) Exit")
+            choice = input("Choose an option: ").strip()
+            if choice == "1":
+                # Signup flow using service
+                username = input("Choose username: ").strip()
+                email = input("Email: ").strip()
+                name = input("Full name: ").strip()
+                bio = input("Bio: ").strip()
+                if not username or not email or not name or not bio:
+                    print("username, email, name and bio are required")
+                    continue
+                password = getpass.getpass("Choose password: ")
+                confirm = getpass.getpass("Confirm password: ")
+                if password != confirm:
+                    print("Passwords do not match.")
+                    continue
+                created = service.register(username, email, bio, name, password)
+                if created:
+                    print(f"User created: {created.username} (userId={created.userId})")
+                else:
+                    print("Failed to create user (may already exist)")
 
-        elif choice == "3":
-            print("Goodbye.")
-            break
-        else:
-            print("Invalid choice. Please select 1, 2 or 3.")
+            elif choice == "2":
+                username = input("Username: ").strip()
+                if not username:
+                    print("Username required.")
+                    continue
+                password = getpass.getpass("Password: ")
+                user = service.authenticate(username, password)
+                if user:
+                    print(f"Login successful. Welcome, {user.name} (userId={user.userId})")
+                    current_user = user
+                else:
+                    print("Invalid credentials.")
+
+            elif choice == "3":
+                print("Goodbye.")
+                break
+            else:
+                print("Invalid choice. Please select 1, 2 or 3.")
+    except (ServiceUnavailable, AuthError) as e:
+        print(f"✗ Error connecting to database: {e}")
+        sys.exit(1)
+    finally:
+        repository.close()
     try:
         del crud
     except Exception:
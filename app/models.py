@@ -19,6 +19,8 @@ class User(BaseModel):
     # Computed fields (not stored in CSV — added dynamically when queried)
     followersCount: Optional[int] = 0
     followingCount: Optional[int] = 0
+    # PageRank score written by the influence job (None until it has run)
+    influenceScore: Optional[float] = None
 
 # # Follow relationship
 # class Follow(BaseModel):
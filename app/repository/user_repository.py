@@ -1,13 +1,63 @@
-from typing import Optional
+import threading
+import time
+from typing import Iterator, Optional
 from database import UserCRUD
+from changelog import OP_CREATE_USER
 from models import User
+from graph.follow_graph import FollowGraph
+from graph.candidates import CandidateIndex
+from graph.paths import ConnectionPath, bidirectional_search, shortest_follow_path
+from graph.snapshot import GraphSnapshot
+from graph.workers import GraphWorkerPool
+from utils.singleflight import SingleFlight, coalesced
+from utils.bloom import CountingBloomFilter
+from utils.profiling import profile_methods
 
 
+@profile_methods("repository", extra=("_to_model",))
 class UserRepository:
     """Repository layer translating between DB rows and Pydantic models."""
 
-    def __init__(self, crud: UserCRUD):
+    def __init__(self, crud: UserCRUD, username_filter_fpr: Optional[float] = None, graph_workers: Optional[int] = None, username_filter_ttl: float = 60.0, graph_workers_refresh: float = 60.0):
         self.crud = crud
+        # Bloom filter of all usernames, so lookups of unknown names skip the DB.
+        # Enabled by passing a false-positive rate. It is built from the DB in
+        # a background thread, started by the first lookup and again every
+        # `username_filter_ttl` seconds, and swapped in whole; lookups go to
+        # the DB until the first build is done. Users registered by other
+        # processes reach it through the change log, if there is one (see
+        # `might_exist`), otherwise only through the next rebuild.
+        self.username_filter_fpr = username_filter_fpr
+        self.username_filter_ttl = username_filter_ttl
+        self._usernames: Optional[CountingBloomFilter] = None
+        self._usernames_lock = threading.Lock()
+        self._usernames_builder: Optional[threading.Thread] = None
+        self._usernames_built_at = float("-inf")
+        # change log offset the filter has caught up to
+        self._usernames_offset = 0
+        # names created here while a rebuild reads the DB, added to the new filter
+        self._usernames_pending: Optional[list[str]] = None
+        self._graph: Optional[FollowGraph] = None
+        self._candidates: Optional[CandidateIndex] = None
+        self._snapshot: Optional[GraphSnapshot] = None
+        # With `graph_workers`, search and popular users are answered by a
+        # worker pool over a snapshot of the DB, rebuilt in the background
+        # every `graph_workers_refresh` seconds. After a write through this
+        # repository the pool is behind, so those reads go to the DB until
+        # the next rebuild. Mutuals and recommendations, where users expect
+        # to see their own follows, always go to the DB.
+        self.graph_workers = graph_workers
+        self.graph_workers_refresh = graph_workers_refresh
+        self._pool: Optional[GraphWorkerPool] = None
+        self._pool_lock = threading.Lock()
+        self._pool_builder: Optional[threading.Thread] = None
+        self._pool_attempted_at = float("-inf")
+        # number of writes made through this repository; the pool is current
+        # while `_pool_writes` (the count its snapshot was taken at) matches
+        self._writes = 0
+        self._pool_writes = -1
+        # identical concurrent reads share one DB query (see @coalesced methods)
+        self._flight = SingleFlight()
 
     def create(self, user: User) -> Optional[User]:
         data = self.crud.create_user(
@@ -20,14 +70,40 @@ class UserRepository:
         )
         if not data:
             return None
+        self._note_write()
+        # MERGE hands back the existing node for a taken username; only count new users
+        if data["userId"] == user.userId:
+            with self._usernames_lock:
+                if self._usernames is not None:
+                    self._usernames.add(data["username"])
+                if self._usernames_pending is not None:
+                    self._usernames_pending.append(data["username"])
         return self._to_model(data)
 
-    def get_by_username(self, username: str) -> Optional[User]:
+    @coalesced
+    def get_by_username(self, username: str, fresh: bool = False) -> Optional[User]:
+        """Look up one user; names the username filter rejects skip the DB.
+
+        Pass fresh=True where a user registered moments ago by another
+        process must be found (see `might_exist`).
+        """
+        if not self.might_exist(username, fresh=fresh):
+            return None
         data = self.crud.get_user_by_username(username)
         if not data:
             return None
         return self._to_model(data)
     
+    def get_users_by_usernames(self, usernames: list[str]) -> tuple[list[User], list[str]]:
+        """Hydrate many users with one query; returns (users in input order, missing usernames)."""
+        raw, missing = self.crud.get_users_by_usernames(usernames)
+        return [self._to_model(r) for r in raw], missing
+
+    def get_users_by_ids(self, user_ids: list[str]) -> tuple[list[User], list[str]]:
+        """Hydrate many users by userId with one query; returns (users in input order, missing ids)."""
+        raw, missing = self.crud.get_users_by_ids(user_ids)
+        return [self._to_model(r) for r in raw], missing
+
     def update(self, user_id: str, name: Optional[str] = None, email: Optional[str] = None, password_hash: Optional[str] = None, bio: Optional[str] = None) -> Optional[User]:
         data = self.crud.update_user(
             user_id=user_id,
@@ -38,8 +114,36 @@ class UserRepository:
         )
         if not data:
             return None
+        self._note_write()
         return self._to_model(data)
 
+    def delete(self, user_id: str, batch_size: int = 1000) -> Optional[dict]:
+        """Delete a user and its edges in batches; returns the CRUD deletion stats."""
+        stats = self.crud.delete_user(user_id, batch_size=batch_size)
+        if stats:
+            self._note_write()
+        if stats:
+            # a rebuild in progress may still see the user in the DB; that
+            # only costs a false positive until the next one
+            with self._usernames_lock:
+                if self._usernames is not None:
+                    self._usernames.remove(stats["username"])
+        if stats and self._graph is not None:
+            self._drop_user_edges(stats["username"])
+        return stats
+
+    def _drop_user_edges(self, username: str):
+        # keep the cached graph and candidate index in step with a deletion
+        graph = self._graph
+        u = graph.index_of(username)
+        if u is None:
+            return
+        edges = [(u, v) for v in graph.followees(u)] + [(v, u) for v in graph.followers(u)]
+        for a, b in edges:
+            graph.remove_edge(graph.usernames[a], graph.usernames[b])
+            if self._candidates is not None:
+                self._candidates.on_unfollow(a, b)
+
     def _to_model(self, data: dict) -> User:
         # map DB record dict into User model; fill missing fields with sensible defaults
         return User(
@@ -52,40 +156,263 @@ class UserRepository:
             version=int(data.get("version", 1)),
             followersCount=int(data.get("followersCount", 0)) if data.get("followersCount") is not None else 0,
             followingCount=int(data.get("followingCount", 0)) if data.get("followingCount") is not None else 0,
+            influenceScore=data.get("influenceScore"),
         )
 
     def follow(self, follower_username: str, followee_username: str) -> bool:
         """Create a follow relationship via the CRUD layer."""
-        return self.crud.follow_user(follower_username, followee_username)
+        ok = self.crud.follow_user(follower_username, followee_username)
+        if ok:
+            self._note_write()
+        if ok and self._graph is not None:
+            if self._graph.add_edge(follower_username, followee_username) and self._candidates is not None:
+                self._candidates.on_follow(self._graph.index_of(follower_username), self._graph.index_of(followee_username))
+        return ok
 
     def unfollow(self, follower_username: str, followee_username: str) -> bool:
         """Remove a follow relationship via the CRUD layer."""
-        return self.crud.unfollow_user(follower_username, followee_username)
+        ok = self.crud.unfollow_user(follower_username, followee_username)
+        if ok:
+            self._note_write()
+        if ok and self._graph is not None:
+            if self._graph.remove_edge(follower_username, followee_username) and self._candidates is not None:
+                self._candidates.on_unfollow(self._graph.index_of(follower_username), self._graph.index_of(followee_username))
+        return ok
 
+    @coalesced
     def get_followers(self, username: str, skip: int = 0, limit: int = 100) -> list[User]:
         """Return list of `User` models representing users who follow `username`."""
         raw = self.crud.get_followers_for_user(username, skip=skip, limit=limit)
         return [self._to_model(r) for r in raw] if raw else []
 
+    @coalesced
     def get_following(self, username: str, skip: int = 0, limit: int = 100) -> list[User]:
         """Return list of `User` models representing users whom `username` follows."""
         raw = self.crud.get_following_for_user(username, skip=skip, limit=limit)
         return [self._to_model(r) for r in raw] if raw else []
     
+    def iter_followers(self, username: str, page_size: int = 100) -> Iterator[User]:
+        """Lazily yield every follower of `username`, fetching one page at a time."""
+        return self._iter_pages(self.crud.get_followers_for_user, username, page_size)
+
+    def iter_following(self, username: str, page_size: int = 100) -> Iterator[User]:
+        """Lazily yield every user `username` follows, fetching one page at a time."""
+        return self._iter_pages(self.crud.get_following_for_user, username, page_size)
+
+    def _iter_pages(self, fetch, username: str, page_size: int) -> Iterator[User]:
+        # keyset paging on username: the next page is only queried once the
+        # consumer has used up the current one
+        after = None
+        while True:
+            page = fetch(username, limit=page_size, after=after)
+            for row in page:
+                yield self._to_model(row)
+            if len(page) < page_size:
+                return
+            after = page[-1]["username"]
+
+    @coalesced
     def get_mutuals(self, username1: str, username2: str) -> list[User]:
         raw = self.crud.get_mutual_connections(username1, username2)
         return [self._to_model(r) for r in raw]
     
+    @coalesced
     def get_recommendations(self, username: str) -> list[User]:
         raw = self.crud.get_friend_recommendations(username)
         return [self._to_model(r) for r in raw]
     
+    @coalesced
     def search(self, query_term: str) -> list[User]:
         """Search for users matching the query term."""
+        names = self._ask_pool("search_users", query_term)
+        if names is not None:
+            users, _ = self.get_users_by_usernames(names)
+            return users
         raw = self.crud.search_users(query_term)
         return [self._to_model(r) for r in raw]
     
-    def get_popular(self) -> list[User]:
+    @coalesced
+    def get_popular(self, by_influence: bool = False) -> list[User]:
         """Fetch popular users from the DB and convert to models."""
-        raw = self.crud.get_popular_users()
+        names = None if by_influence else self._ask_pool("get_popular_users")
+        if names is not None:
+            users, _ = self.get_users_by_usernames(names)
+            return users
+        raw = self.crud.get_popular_users(by_influence=by_influence)
         return [self._to_model(r) for r in raw]
+
+    def find_connection_path(self, source: str, target: str, max_hops: int = 6, max_visited: int = 100_000, in_process: bool = True) -> ConnectionPath:
+        """Shortest FOLLOWS path between two usernames, as a list of usernames.
+
+        Searches the in-process graph by default; with `in_process=False`
+        each BFS level is fetched from the DB instead, so the answer reflects
+        the latest writes without loading the whole graph.
+        """
+        if not in_process:
+            return bidirectional_search(
+                source,
+                target,
+                lambda frontier: self.crud.iter_follow_neighbors(frontier),
+                lambda frontier: self.crud.iter_follow_neighbors(frontier, reverse=True),
+                max_hops=max_hops,
+                max_visited=max_visited,
+            )
+        graph = self.get_graph()
+        s, t = graph.index_of(source), graph.index_of(target)
+        if s is None or t is None:
+            return ConnectionPath([], False, 0)
+        result = shortest_follow_path(graph, s, t, max_hops=max_hops, max_visited=max_visited)
+        return result._replace(path=[graph.usernames[u] for u in result.path])
+
+    async def call_async(self, name: str, *args, **kwargs):
+        """Run a coalesced read method for asyncio callers, e.g. `await repo.call_async("get_popular")`."""
+        method = getattr(getattr(type(self), name), "coalesced_method", None)
+        if method is None:
+            raise ValueError(f"{name} is not a coalesced read method")
+        key = (name, args, tuple(sorted(kwargs.items())))
+        return await self._flight.do_async(key, method, self, *args, **kwargs)
+
+    def coalescing_stats(self) -> dict:
+        """How many read calls were made, executed against the DB, and coalesced."""
+        return self._flight.stats()
+
+    def get_graph(self, refresh: bool = False) -> FollowGraph:
+        """Return the in-process FOLLOWS graph, loading it from the DB on first use."""
+        if self._graph is None or refresh:
+            self._graph = FollowGraph.from_crud(self.crud)
+            self._candidates = None
+        return self._graph
+
+    def load_graph_snapshot(self, path: str) -> FollowGraph:
+        """Warm-start the in-process graph from a snapshot file instead of the DB.
+
+        Follows/unfollows made after the snapshot was taken are not in it;
+        later ones are applied on top as usual.
+        """
+        self._snapshot = GraphSnapshot(path)
+        self._graph = self._snapshot.to_graph()
+        self._candidates = None
+        return self._graph
+
+    def load_username_filter(self) -> CountingBloomFilter:
+        """(Re)build the username filter from the usernames currently in the DB and swap it in."""
+        changelog = self.crud.changelog
+        # users logged from here on are replayed onto the new filter
+        offset = changelog.end_offset if changelog is not None else 0
+        with self._usernames_lock:
+            self._usernames_pending = []
+        try:
+            bloom = CountingBloomFilter.from_keys(self.crud.get_all_usernames(), self.username_filter_fpr or 0.01)
+            with self._usernames_lock:
+                for name in self._usernames_pending:
+                    bloom.add(name)
+                self._usernames, self._usernames_offset = bloom, offset
+        finally:
+            with self._usernames_lock:
+                self._usernames_pending = None
+        return bloom
+
+    def might_exist(self, username: str, fresh: bool = False) -> bool:
+        """False if `username` is known not to be registered.
+
+        Users created or deleted through this repository are reflected at
+        once. With a change log, a name the filter rejects is checked again
+        after replaying the users other processes logged since, so the answer
+        is current. Without one they only show up with the next rebuild, so
+        `fresh` lookups are never rejected. Never waits for a rebuild.
+        """
+        if not self.username_filter_fpr:
+            return True
+        self._refresh_username_filter()
+        bloom = self._usernames
+        if bloom is None or username in bloom:
+            return True
+        changelog = self.crud.changelog
+        if changelog is None:
+            return fresh
+        with self._usernames_lock:
+            for event in changelog.replay(self._usernames_offset):
+                if event.op == OP_CREATE_USER:
+                    self._usernames.add(event.fields[1])
+                self._usernames_offset = event.next_offset
+            return username in self._usernames
+
+    def _refresh_username_filter(self):
+        # start a background rebuild when the filter is missing or expired
+        with self._usernames_lock:
+            if self._usernames_builder is not None or time.monotonic() - self._usernames_built_at < self.username_filter_ttl:
+                return
+            self._usernames_built_at = time.monotonic()
+            self._usernames_builder = threading.Thread(target=self._rebuild_username_filter, daemon=True)
+            self._usernames_builder.start()
+
+    def _rebuild_username_filter(self):
+        try:
+            self.load_username_filter()
+        except Exception as e:
+            print(f"Warning: could not rebuild the username filter: {e}")
+        finally:
+            with self._usernames_lock:
+                self._usernames_builder = None
+
+    def get_worker_pool(self) -> Optional[GraphWorkerPool]:
+        """Return the graph worker pool if it reflects every write made through this repository.
+
+        Returns None (read from the DB instead) when `graph_workers` is not
+        set, the pool is still being built, or it is behind. Starts a
+        background rebuild once the pool is `graph_workers_refresh` seconds
+        old; the request thread never waits for one.
+        """
+        if not self.graph_workers:
+            return None
+        with self._pool_lock:
+            due = time.monotonic() - self._pool_attempted_at >= self.graph_workers_refresh
+            if due and self._pool_builder is None:
+                self._pool_attempted_at = time.monotonic()
+                self._pool_builder = threading.Thread(target=self._rebuild_pool, args=(self._writes,), daemon=True)
+                self._pool_builder.start()
+            return self._pool if self._pool_writes == self._writes else None
+
+    def _rebuild_pool(self, writes: int):
+        try:
+            pool = GraphWorkerPool.from_crud(self.crud, self.graph_workers)
+        except Exception as e:
+            print(f"Warning: could not start graph workers: {e}")
+            pool = None
+        with self._pool_lock:
+            old = None
+            if pool is not None:
+                old, self._pool, self._pool_writes = self._pool, pool, writes
+            self._pool_builder = None
+        if old is not None:
+            old.close()
+
+    def _ask_pool(self, op: str, *args) -> Optional[list[str]]:
+        # usernames from a pool scatter-gather query, or None to fall back to the DB
+        pool = self.get_worker_pool()
+        if pool is None:
+            return None
+        try:
+            return [name for name, _ in getattr(pool, op)(*args)]
+        except RuntimeError:
+            return None
+
+    def _note_write(self):
+        with self._pool_lock:
+            self._writes += 1
+
+    def close(self):
+        """Stop the graph worker pool, waiting for background rebuilds in progress."""
+        for builder in (self._usernames_builder, self._pool_builder):
+            if builder is not None:
+                builder.join()
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.close()
+
+    def get_candidate_index(self) -> CandidateIndex:
+        """Return the materialized friend-of-friend scores, building them on first use."""
+        if self._candidates is None:
+            self._candidates = CandidateIndex(self.get_graph())
+        return self._candidates
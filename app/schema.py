@@ -0,0 +1,68 @@
+"""Versioned schema migrations for the Neo4j database.
+
+Each migration is applied once; the highest applied version is recorded on a
+single `:SchemaVersion` node so later runs skip straight past it. Run it after
+deploying a new version (seed.py runs it too):
+
+    python schema.py
+"""
+from database import UserCRUD, NEO4J_URI, NEO4J_USERNAME, NEO4J_PASSWORD
+
+# (version, description, statements) - append new entries, never edit old ones
+MIGRATIONS = [
+    (1, "username uniqueness", [
+        "CREATE CONSTRAINT user_username_unique IF NOT EXISTS FOR (u:User) REQUIRE u.username IS UNIQUE",
+    ]),
+    (2, "userId uniqueness", [
+        "CREATE CONSTRAINT user_userid_unique IF NOT EXISTS FOR (u:User) REQUIRE u.userId IS UNIQUE",
+    ]),
+    (3, "counter and score range indexes", [
+        "CREATE INDEX user_followers_count IF NOT EXISTS FOR (u:User) ON (u.followersCount)",
+        "CREATE INDEX user_following_count IF NOT EXISTS FOR (u:User) ON (u.followingCount)",
+        "CREATE INDEX user_influence_score IF NOT EXISTS FOR (u:User) ON (u.influenceScore)",
+    ]),
+    (4, "full-text index on username and name", [
+        "CREATE FULLTEXT INDEX user_search IF NOT EXISTS FOR (u:User) ON EACH [u.username, u.name]",
+    ]),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def get_applied_version(driver) -> int:
+    """Return the recorded schema version (0 for a fresh database)."""
+    with driver.session() as session:
+        record = session.run(
+            "MATCH (s:SchemaVersion {name: 'buddy-bloom'}) RETURN s.version AS version"
+        ).single()
+        return record["version"] if record else 0
+
+
+def migrate(driver) -> int:
+    """Apply every pending migration in order and return the resulting version."""
+    current = get_applied_version(driver)
+    for version, description, statements in MIGRATIONS:
+        if version <= current:
+            continue
+        with driver.session() as session:
+            for statement in statements:
+                session.run(statement)
+            # record progress after each step so a failure resumes from here
+            session.run(
+                """
+                MERGE (s:SchemaVersion {name: 'buddy-bloom'})
+                SET s.version = $version, s.description = $description, s.appliedAt = datetime()
+                """,
+                version=version,
+                description=description,
+            )
+        print(f"Applied schema migration {version}: {description}")
+        current = version
+    return current
+
+
+if __name__ == "__main__":
+    crud = UserCRUD(NEO4J_URI, NEO4J_USERNAME, NEO4J_PASSWORD)
+    version = migrate(crud.driver)
+    print(f"Schema is at version {version} (latest {LATEST_VERSION}).")
+    crud.driver.close()
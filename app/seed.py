@@ -2,11 +2,14 @@ import csv
 import sys
 
 from database import UserCRUD, NEO4J_URI, NEO4J_USERNAME, NEO4J_PASSWORD
+from schema import migrate
 
 def seed_data():
     print(f"Connecting to Aura at {NEO4J_URI}...")
     try:
         crud = UserCRUD(NEO4J_URI, NEO4J_USERNAME, NEO4J_PASSWORD)
+        crud.driver.verify_connectivity()
+        migrate(crud.driver)
     except Exception as e:
         print(f"Connection failed: {e}")
         sys.exit(1)
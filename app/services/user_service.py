@@ -1,10 +1,21 @@
-from typing import Optional
+from typing import Iterator, Optional
 import uuid
 from repository.user_repository import UserRepository
 from models import User
 from utils.string import hash_password, check_password
+from utils.profiling import profile_methods
+from graph.ranking import personalized_pagerank, monte_carlo_ppr, top_candidates, bounded_friends_of_friends
 
+# "fof": 2-hop friends-of-friends count (Cypher)
+# "fof-index": the same count, read from the incrementally maintained CandidateIndex
+# "fof-bounded": the same count with a per-friend fan-out cap and a time budget
+# "ppr": personalized PageRank by power iteration over the in-process graph
+# "ppr-mc": personalized PageRank estimated with time-budgeted random walks
+RECOMMENDATION_MODES = ("fof", "fof-index", "fof-bounded", "ppr", "ppr-mc")
+PATH_BACKENDS = ("graph", "db")
 
+
+@profile_methods("service")
 class UserService:
     """Business logic for user operations."""
 
@@ -27,7 +38,7 @@ class UserService:
         return created
 
     def authenticate(self, username: str, password: str) -> Optional[User]:
-        user = self.repo.get_by_username(username)
+        user = self.repo.get_by_username(username, fresh=True)
         if not user:
             return None
         if not user.passwordHash:
@@ -51,6 +62,21 @@ class UserService:
         
         return updated_user
 
+    def delete_account(self, current_user: User, password: str) -> tuple[bool, str]:
+        """Delete current_user's account after re-checking their password.
+
+        Returns (success, message).
+        """
+        if not current_user:
+            return False, "Authentication required."
+        if not self.authenticate(current_user.username, password):
+            return False, "Incorrect password."
+
+        stats = self.repo.delete(current_user.userId)
+        if not stats:
+            return False, "Account not found."
+        return True, f"Account {stats['username']} deleted ({stats['following'] + stats['followers']} connections removed)."
+
     def get_followers(self, current_user: User, target_username: Optional[str] = None, skip: int = 0, limit: int = 100) -> tuple[bool, list[User], str]:
         """Return followers for target_username (defaults to current_user)."""
         if not current_user:
@@ -87,6 +113,34 @@ class UserService:
         following = self.repo.get_following(target, skip=skip, limit=limit)
         return True, following, f"Found {len(following)} users followed by {target}."
 
+    def iter_followers(self, current_user: User, target_username: Optional[str] = None, page_size: int = 100) -> tuple[bool, Iterator[User], str]:
+        """Lazily iterate all followers of target_username (defaults to current_user).
+
+        Pages of `page_size` are fetched only as the iterator is advanced, so
+        any follower count can be walked in constant memory.
+        """
+        ok, target, msg = self._check_paged_target(current_user, target_username, page_size)
+        if not ok:
+            return False, iter(()), msg
+        return True, self.repo.iter_followers(target, page_size=page_size), f"Followers of {target}."
+
+    def iter_following(self, current_user: User, target_username: Optional[str] = None, page_size: int = 100) -> tuple[bool, Iterator[User], str]:
+        """Lazily iterate all users target_username follows (defaults to current_user)."""
+        ok, target, msg = self._check_paged_target(current_user, target_username, page_size)
+        if not ok:
+            return False, iter(()), msg
+        return True, self.repo.iter_following(target, page_size=page_size), f"Users followed by {target}."
+
+    def _check_paged_target(self, current_user: User, target_username: Optional[str], page_size: int) -> tuple[bool, str, str]:
+        if not current_user:
+            return False, "", "Authentication required."
+        if page_size <= 0 or page_size > 1000:
+            return False, "", "Invalid page size."
+        target = target_username or current_user.username
+        if not self.repo.get_by_username(target):
+            return False, "", "Target user not found."
+        return True, target, ""
+
     def follow(self, current_user: User, target_username: str) -> tuple[bool, str]:
         """Make current_user follow target_username.
 
@@ -97,7 +151,7 @@ class UserService:
         if current_user.username == target_username:
             return False, "You cannot follow yourself."
 
-        target = self.repo.get_by_username(target_username)
+        target = self.repo.get_by_username(target_username, fresh=True)
         if not target:
             return False, "Target user not found." 
 
@@ -116,7 +170,7 @@ class UserService:
         if current_user.username == target_username:
             return False, "You cannot unfollow yourself."
 
-        target = self.repo.get_by_username(target_username)
+        target = self.repo.get_by_username(target_username, fresh=True)
         if not target:
             return False, "Target user not found." 
 
@@ -136,15 +190,80 @@ class UserService:
         mutuals = self.repo.get_mutuals(current_user.username, target_username)
         return mutuals, f"Found {len(mutuals)} mutual connections."
     
-    def get_recommendations(self, current_user: User) -> list[User]:
+    def get_connection_path(self, current_user: User, target_username: str, backend: str = "graph", max_hops: int = 6, max_visited: int = 100_000) -> tuple[list[User], str]:
+        """How current_user reaches target_username through people they follow.
+
+        Returns (users along the path, current_user first and target last,
+        message); the list is empty if no path is found within the limits.
+        """
         if not current_user:
+            return [], "Authentication required."
+        if backend not in PATH_BACKENDS:
+            raise ValueError(f"Unknown path backend: {backend}")
+        if current_user.username == target_username:
+            return [], "That's you."
+
+        target = self.repo.get_by_username(target_username)
+        if not target:
+            return [], "Target user not found."
+
+        result = self.repo.find_connection_path(current_user.username, target_username, max_hops=max_hops, max_visited=max_visited, in_process=backend == "graph")
+        if not result.path:
+            if result.truncated:
+                return [], f"No connection found within the search limits ({result.visited} users checked)."
+            return [], f"You are not connected to {target_username}."
+        users, _ = self.repo.get_users_by_usernames(result.path)
+        return users, f"Connected in {len(result.path) - 1} hop(s)."
+
+    def get_recommendations(self, current_user: User, mode: str = "fof", limit: int = 5) -> list[User]:
+        """Recommend users to follow using the selected `mode` (see RECOMMENDATION_MODES)."""
+        if not current_user:
+            return []
+        if mode not in RECOMMENDATION_MODES:
+            raise ValueError(f"Unknown recommendation mode: {mode}")
+        if mode == "fof":
+            return self.repo.get_recommendations(current_user.username)
+        if mode == "fof-bounded":
+            recs, _ = self.get_bounded_recommendations(current_user, limit=limit)
+            return recs
+
+        graph = self.repo.get_graph()
+        source = graph.index_of(current_user.username)
+        if source is None:
             return []
-        return self.repo.get_recommendations(current_user.username)
+        if mode == "fof-index":
+            top = self.repo.get_candidate_index().top(source, limit)
+        elif mode == "ppr":
+            top = top_candidates(graph, source, personalized_pagerank(graph, source), limit)
+        else:
+            top = top_candidates(graph, source, monte_carlo_ppr(graph, source), limit)
+
+        recs, _ = self.repo.get_users_by_usernames([graph.usernames[u] for u, _ in top])
+        return recs
     
+    def get_bounded_recommendations(self, current_user: User, limit: int = 5, fanout_cap: int = 200, time_budget: float = 0.02) -> tuple[list[User], bool]:
+        """Friend-of-friend recommendations with bounded work for hub-heavy neighborhoods.
+
+        Returns (recommendations, truncated); truncated means hubs were
+        sampled or the budget ran out, so the list is a best effort.
+        """
+        if not current_user:
+            return [], False
+        graph = self.repo.get_graph()
+        source = graph.index_of(current_user.username)
+        if source is None:
+            return [], False
+        result = bounded_friends_of_friends(graph, source, limit=limit, fanout_cap=fanout_cap, time_budget=time_budget)
+        recs, _ = self.repo.get_users_by_usernames([graph.usernames[u] for u, _ in result.candidates])
+        return recs, result.truncated
+
     def search_users(self, term: str) -> list[User]:
         if not term:
             return []
         return self.repo.search(term)
     
-    def get_popular_users(self) -> list[User]:
-        return self.repo.get_popular()
+    def get_popular_users(self, rank_by: str = "followers") -> list[User]:
+        """Top users ranked by follower count or, with rank_by="influence", by PageRank."""
+        if rank_by not in ("followers", "influence"):
+            raise ValueError(f"Unknown ranking: {rank_by}")
+        return self.repo.get_popular(by_influence=rank_by == "influence")
@@ -0,0 +1,78 @@
+import hashlib
+import math
+from typing import Iterable
+
+
+class CountingBloomFilter:
+    """Counting Bloom filter over strings, backed by a bytearray of 8-bit counters.
+
+    `might_contain` never returns False for a key that was added and not
+    removed; it returns True for an absent key with probability about
+    `false_positive_rate` while no more than `capacity` keys are stored.
+    Counters (rather than bits) are what make `remove` possible. A counter
+    that saturates at 255 is never decremented again, so it can only cost
+    false positives, never false negatives.
+    """
+
+    def __init__(self, capacity: int, false_positive_rate: float = 0.01):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        if not 0 < false_positive_rate < 1:
+            raise ValueError("false_positive_rate must be between 0 and 1")
+        self.capacity = capacity
+        self.false_positive_rate = false_positive_rate
+        self.size = max(8, math.ceil(-capacity * math.log(false_positive_rate) / math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.counters = bytearray(self.size)
+        self.count = 0
+
+    @classmethod
+    def from_keys(cls, keys: Iterable[str], false_positive_rate: float = 0.01, headroom: float = 1.0) -> "CountingBloomFilter":
+        """Build a filter sized for `headroom` times the number of `keys`.
+
+        With the default headroom the false-positive rate is
+        `false_positive_rate` right away; headroom > 1 lowers it for now
+        (at proportionally more memory) so it stays within target as keys
+        are added.
+        """
+        keys = list(keys)
+        bloom = cls(max(1024, int(len(keys) * headroom)), false_positive_rate)
+        for key in keys:
+            bloom.add(key)
+        return bloom
+
+    def _positions(self, key: str):
+        # double hashing: k positions derived from two 64-bit halves of one digest
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.num_hashes)]
+
+    def add(self, key: str):
+        for pos in self._positions(key):
+            if self.counters[pos] < 255:
+                self.counters[pos] += 1
+        self.count += 1
+
+    def remove(self, key: str):
+        """Remove a key previously added; removing a key that was never added corrupts the filter."""
+        positions = self._positions(key)
+        if not all(self.counters[pos] for pos in positions):
+            return
+        for pos in positions:
+            if self.counters[pos] < 255:
+                self.counters[pos] -= 1
+        self.count -= 1
+
+    def might_contain(self, key: str) -> bool:
+        return all(self.counters[pos] for pos in self._positions(key))
+
+    __contains__ = might_contain
+
+    @property
+    def memory_bytes(self) -> int:
+        return len(self.counters)
+
+    def expected_false_positive_rate(self) -> float:
+        """Estimated false-positive rate at the current number of keys."""
+        return (1 - math.exp(-self.num_hashes * self.count / self.size)) ** self.num_hashes
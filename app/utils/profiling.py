@@ -0,0 +1,328 @@
+"""Opt-in per-call profiling across the service, repository, CRUD and driver layers.
+
+Set PROFILE=true (see .env.example) and every top-level operation prints a
+breakdown of nested spans to stderr:
+
+    service.get_recommendations -> repository.get_recommendations
+        -> crud.get_friend_recommendations -> driver.run / driver.fetch
+
+plus repository._to_model (pydantic) and crypto.* (bcrypt). Repeated calls
+of the same span under one parent are merged, with a call count. Optional:
+
+    PROFILE_OUTPUT=path           append one JSON record per operation
+    PROFILE_CPROFILE=name         run the next `name` operation (e.g.
+                                  "get_recommendations") under cProfile
+    PROFILE_CPROFILE_OUTPUT=path  dump those stats there instead of printing
+
+When PROFILE is off, `profiled`, `profile_methods` and `instrument_driver`
+return their argument unchanged, so there is no per-call cost at all.
+"""
+import atexit
+import cProfile
+import functools
+import inspect
+import io
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+from typing import Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+ENABLED = os.getenv("PROFILE", "False").lower() == "true"
+PROFILE_OUTPUT = os.getenv("PROFILE_OUTPUT")
+PROFILE_CPROFILE = os.getenv("PROFILE_CPROFILE")
+PROFILE_CPROFILE_OUTPUT = os.getenv("PROFILE_CPROFILE_OUTPUT")
+
+# span name prefixes, in report order
+LAYERS = ("service", "repository", "crud", "driver", "crypto")
+
+
+class _Span:
+    __slots__ = ("name", "calls", "total", "children")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.calls = 0
+        self.total = 0.0
+        self.children: dict[str, "_Span"] = {}
+
+    def child(self, name: str) -> "_Span":
+        span = self.children.get(name)
+        if span is None:
+            span = self.children[name] = _Span(name)
+        return span
+
+    @property
+    def self_time(self) -> float:
+        return self.total - sum(c.total for c in self.children.values())
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "calls": self.calls,
+            "total_ms": round(self.total * 1000, 3),
+            "self_ms": round(self.self_time * 1000, 3),
+            "children": [c.to_dict() for c in self.children.values()],
+        }
+
+
+_local = threading.local()
+_lock = threading.Lock()
+# root operation name -> [calls, total seconds, {layer: self seconds}]
+_totals: dict[str, list] = {}
+_capture: Optional[tuple[_Span, cProfile.Profile]] = None
+_capture_done = False
+
+
+def _stack() -> list[_Span]:
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+
+def _enter(name: str, count: bool = True, root: bool = True) -> Optional[_Span]:
+    """Open span `name` under the current one; None if it may not start a new operation."""
+    global _capture, _capture_done
+    stack = _stack()
+    if stack:
+        span = stack[-1].child(name)
+    elif root:
+        span = _Span(name)
+    else:
+        return None
+    if count:
+        span.calls += 1
+    stack.append(span)
+    if PROFILE_CPROFILE and not _capture_done and PROFILE_CPROFILE in (name, name.split(".", 1)[-1]):
+        with _lock:
+            if not _capture_done:
+                _capture_done = True
+                _capture = (span, cProfile.Profile())
+                _capture[1].enable()
+    return span
+
+
+def _exit(span: _Span, start: float):
+    global _capture
+    span.total += time.perf_counter() - start
+    stack = _stack()
+    stack.pop()
+    if _capture is not None and _capture[0] is span:
+        _capture[1].disable()
+        _report_capture(span.name, _capture[1])
+        _capture = None
+    if not stack:
+        _finish(span)
+
+
+def _add(name: str, seconds: float, count: bool = True):
+    """Charge `seconds` to child `name` of the open span, without opening it."""
+    stack = _stack()
+    if not stack:
+        return
+    span = stack[-1].child(name)
+    span.total += seconds
+    if count:
+        span.calls += 1
+
+
+def _layer_times(span: _Span, acc: dict) -> dict:
+    layer = span.name.split(".", 1)[0]
+    acc[layer] = acc.get(layer, 0.0) + span.self_time
+    for child in span.children.values():
+        _layer_times(child, acc)
+    return acc
+
+
+def _format(span: _Span, depth: int = 0) -> list[str]:
+    lines = [f"  {span.total * 1000:10.2f} {span.self_time * 1000:10.2f} {span.calls:7d}  {'  ' * depth}{span.name}"]
+    for child in sorted(span.children.values(), key=lambda c: c.total, reverse=True):
+        lines.extend(_format(child, depth + 1))
+    return lines
+
+
+def _finish(root: _Span):
+    layers = _layer_times(root, {})
+    with _lock:
+        totals = _totals.setdefault(root.name, [0, 0.0, {}])
+        totals[0] += 1
+        totals[1] += root.total
+        for layer, seconds in layers.items():
+            totals[2][layer] = totals[2].get(layer, 0.0) + seconds
+
+        by_layer = ", ".join(f"{layer} {layers[layer] * 1000:.2f}ms" for layer in _ordered(layers))
+        lines = [f"[profile] {root.name} {root.total * 1000:.2f}ms ({by_layer})",
+                 f"  {'total ms':>10} {'self ms':>10} {'calls':>7}  span"]
+        lines.extend(_format(root))
+        print("\n".join(lines), file=sys.stderr)
+
+        if PROFILE_OUTPUT:
+            record = {"timestamp": time.time(), "layers_ms": {k: round(v * 1000, 3) for k, v in layers.items()}, **root.to_dict()}
+            with open(PROFILE_OUTPUT, "a") as f:
+                f.write(json.dumps(record) + "\n")
+
+
+def _ordered(layers: dict) -> list[str]:
+    return [layer for layer in LAYERS if layer in layers] + sorted(set(layers) - set(LAYERS))
+
+
+def _report_capture(name: str, profile: cProfile.Profile):
+    if PROFILE_CPROFILE_OUTPUT:
+        profile.dump_stats(PROFILE_CPROFILE_OUTPUT)
+        print(f"[profile] cProfile stats for {name} written to {PROFILE_CPROFILE_OUTPUT}", file=sys.stderr)
+        return
+    out = io.StringIO()
+    pstats.Stats(profile, stream=out).sort_stats("cumulative").print_stats(25)
+    print(f"[profile] cProfile of {name}\n{out.getvalue()}", file=sys.stderr)
+
+
+def summary() -> str:
+    """Per-operation call counts, mean latency and share of time per layer so far."""
+    with _lock:
+        items = sorted(_totals.items(), key=lambda item: item[1][1], reverse=True)
+        lines = [f"{'operation':<40} {'calls':>6} {'mean ms':>9}  time by layer"]
+        for name, (calls, total, layers) in items:
+            shares = ", ".join(f"{layer} {layers[layer] / total:.0%}" for layer in _ordered(layers) if total)
+            lines.append(f"{name:<40} {calls:>6} {total / calls * 1000:>9.2f}  {shares}")
+    return "\n".join(lines)
+
+
+def profiled(layer: str, name: Optional[str] = None):
+    """Decorator timing each call as span "<layer>.<function name>"."""
+    def decorate(fn):
+        if not ENABLED:
+            return fn
+        span_name = f"{layer}.{name or fn.__name__}"
+
+        if inspect.isgeneratorfunction(fn):
+            @functools.wraps(fn)
+            def gen_wrapper(*args, **kwargs):
+                # time each resume, but only inside an operation: a generator
+                # drained at top level would otherwise report every item
+                gen = fn(*args, **kwargs)
+                first = True
+                try:
+                    while True:
+                        start = time.perf_counter()
+                        span = _enter(span_name, count=first, root=False)
+                        first = first and span is None
+                        try:
+                            item = next(gen)
+                        except StopIteration:
+                            return
+                        finally:
+                            if span is not None:
+                                _exit(span, start)
+                        yield item
+                finally:
+                    gen.close()
+            return gen_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            span = _enter(span_name)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                _exit(span, start)
+        return wrapper
+    return decorate
+
+
+def profile_methods(layer: str, extra: tuple = ()):
+    """Class decorator applying `profiled(layer)` to every public method plus `extra`."""
+    def decorate(cls):
+        if not ENABLED:
+            return cls
+        for attr, value in list(vars(cls).items()):
+            if not inspect.isfunction(value) or inspect.iscoroutinefunction(value):
+                continue
+            if attr.startswith("_") and attr not in extra:
+                continue
+            setattr(cls, attr, profiled(layer, attr)(value))
+        return cls
+    return decorate
+
+
+class _TimedResult:
+    """Neo4j Result proxy charging record fetching to "driver.fetch"."""
+
+    def __init__(self, result):
+        self._result = result
+
+    def __iter__(self):
+        it = iter(self._result)
+        while True:
+            start = time.perf_counter()
+            try:
+                record = next(it)
+            except StopIteration:
+                _add("driver.fetch", time.perf_counter() - start, count=False)
+                return
+            _add("driver.fetch", time.perf_counter() - start)
+            yield record
+
+    def __getattr__(self, attr):
+        value = getattr(self._result, attr)
+        if not callable(value):
+            return value
+
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return value(*args, **kwargs)
+            finally:
+                _add("driver.fetch", time.perf_counter() - start)
+        return timed
+
+
+class _TimedSession:
+    def __init__(self, session):
+        self._session = session
+
+    def run(self, *args, **kwargs):
+        start = time.perf_counter()
+        span = _enter("driver.run", root=False)
+        try:
+            return _TimedResult(self._session.run(*args, **kwargs))
+        finally:
+            if span is not None:
+                _exit(span, start)
+
+    def __enter__(self):
+        self._session.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        return self._session.__exit__(*exc)
+
+    def __getattr__(self, attr):
+        return getattr(self._session, attr)
+
+
+class _TimedDriver:
+    def __init__(self, driver):
+        self._driver = driver
+
+    def session(self, *args, **kwargs):
+        return _TimedSession(self._driver.session(*args, **kwargs))
+
+    def __getattr__(self, attr):
+        return getattr(self._driver, attr)
+
+
+def instrument_driver(driver):
+    """Wrap a Neo4j driver so session.run and result consumption show up as driver spans."""
+    return _TimedDriver(driver) if ENABLED else driver
+
+
+if ENABLED:
+    atexit.register(lambda: _totals and print("\n[profile] summary\n" + summary(), file=sys.stderr))
@@ -0,0 +1,95 @@
+import asyncio
+import functools
+import threading
+from typing import Any, Callable, Hashable
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+
+
+class SingleFlight:
+    """Merge identical concurrent calls into one execution.
+
+    While a call for `key` is in flight, further calls with the same key wait
+    for it and receive the same result (or exception) instead of running
+    again. Results are shared between callers, so they must not be mutated.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: dict[Hashable, _Call] = {}
+        self._async_calls: dict[tuple, asyncio.Future] = {}
+        self._stats = {"calls": 0, "executions": 0, "coalesced": 0}
+
+    def do(self, key: Hashable, fn: Callable, *args, **kwargs):
+        """Run `fn(*args, **kwargs)` unless an identical call is already running."""
+        with self._lock:
+            self._stats["calls"] += 1
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+                self._stats["executions"] += 1
+            else:
+                self._stats["coalesced"] += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    async def do_async(self, key: Hashable, fn: Callable, *args, **kwargs):
+        """Awaitable `do` for asyncio callers; the blocking `fn` runs in the default executor.
+
+        Coroutines on the same loop share one executor job, and that job also
+        joins any identical call in flight from other threads.
+        """
+        loop = asyncio.get_running_loop()
+        loop_key = (id(loop), key)
+        future = self._async_calls.get(loop_key)
+        if future is None:
+            future = loop.run_in_executor(None, functools.partial(self.do, key, fn, *args, **kwargs))
+            self._async_calls[loop_key] = future
+            future.add_done_callback(lambda _: self._async_calls.pop(loop_key, None))
+        else:
+            with self._lock:
+                self._stats["calls"] += 1
+                self._stats["coalesced"] += 1
+        # shield so one cancelled waiter doesn't cancel the shared call
+        return await asyncio.shield(future)
+
+    def stats(self) -> dict:
+        """Counts of calls made, queries actually executed, and calls coalesced."""
+        with self._lock:
+            return dict(self._stats)
+
+
+def coalesced(method):
+    """Decorator routing a read method through `self._flight` keyed on its name and arguments.
+
+    The undecorated method stays reachable as `coalesced_method`, which
+    survives further `functools.wraps`-based decorators.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        key = (method.__name__, args, tuple(sorted(kwargs.items())))
+        return self._flight.do(key, method, self, *args, **kwargs)
+    wrapper.coalesced_method = method
+    return wrapper
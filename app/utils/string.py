@@ -1,12 +1,17 @@
 import bcrypt
 
+from utils.profiling import profiled
 
+
+# bcrypt is its own "crypto" layer in profiles (no-ops unless PROFILE is set)
+@profiled("crypto")
 def hash_password(password: str) -> str:
     """Hash a password and return the hash as a UTF-8 string."""
     hashed = bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt())
     return hashed.decode("utf-8")
 
 
+@profiled("crypto")
 def check_password(password: str, hashed: str) -> bool:
     """Check a password against a stored UTF-8 hash string."""
     if isinstance(hashed, str):
@@ -17,7 +22,7 @@ def check_password(password: str, hashed: str) -> bool:
 
 
 if __name__ == "__main__":
-    # Quick manual test
+    # Quick manual test; run from the `app/` directory: python -m utils.string
     pw = "mysecret123"
     hashed_pw = hash_password(pw)
     print("Hashed password (str):", hashed_pw)
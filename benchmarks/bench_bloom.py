@@ -0,0 +1,36 @@
+"""Measured false-positive rate, memory and lookup cost of the username filter.
+
+Usage: python benchmarks/bench_bloom.py [--users 1000000] [--fpr 0.01 0.001]
+"""
+import argparse
+import time
+
+import common  # noqa: F401  (puts app/ on sys.path)
+from utils.bloom import CountingBloomFilter
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--probes", type=int, default=200_000)
+    parser.add_argument("--fpr", type=float, nargs="+", default=[0.01, 0.001])
+    args = parser.parse_args()
+
+    usernames = [f"user_{i}" for i in range(args.users)]
+    for fpr in args.fpr:
+        start = time.perf_counter()
+        bloom = CountingBloomFilter.from_keys(usernames, false_positive_rate=fpr)
+        build = time.perf_counter() - start
+
+        start = time.perf_counter()
+        false_positives = sum(f"missing_{i}" in bloom for i in range(args.probes))
+        lookup = (time.perf_counter() - start) / args.probes
+        print(
+            f"target fpr={fpr:<6}  measured={false_positives / args.probes:.5f}  "
+            f"memory={bloom.memory_bytes / 2**20:.1f} MiB  k={bloom.num_hashes}  "
+            f"build={build:.2f}s  lookup={lookup * 1e6:.1f}us"
+        )
+
+
+if __name__ == "__main__":
+    main()
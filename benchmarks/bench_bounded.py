@@ -0,0 +1,64 @@
+"""Full versus bounded friend-of-friend traversal on a skewed graph.
+
+Builds a synthetic graph whose followee choice is Zipf-distributed, so the
+first users are celebrities followed by a large share of the graph, and
+hands those hubs' followers extra follows so the hubs have huge out-degree
+too. Sampled sources follow a few hubs. For each source the full 2-hop
+count and the bounded traversal are timed, and the bounded top-k is scored
+by the share of the exact top-k strength it reaches.
+
+Usage: python benchmarks/bench_bounded.py [--users 100000] [--skew 1.2]
+"""
+import argparse
+import random
+
+from common import synthetic_graph, timed, report, percentile
+from graph.ranking import friends_of_friends, top_candidates, bounded_friends_of_friends
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--degree", type=float, default=10.0)
+    parser.add_argument("--skew", type=float, default=1.2)
+    parser.add_argument("--hubs", type=int, default=20, help="users given a huge out-degree")
+    parser.add_argument("--sources", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--cap", type=int, default=200)
+    parser.add_argument("--budget-ms", type=float, default=20.0)
+    args = parser.parse_args()
+
+    rng = random.Random(3)
+    graph = synthetic_graph(args.users, avg_degree=args.degree, skew=args.skew)
+    # hubs also follow a big slice of the graph, like aggregator accounts
+    for hub in range(args.hubs):
+        for v in rng.sample(range(graph.num_users), graph.num_users // 10):
+            graph.add_edge(graph.usernames[hub], graph.usernames[v])
+    sources = rng.sample(range(args.hubs, graph.num_users), args.sources)
+    for s in sources:
+        for hub in rng.sample(range(args.hubs), 3):
+            graph.add_edge(graph.usernames[s], graph.usernames[hub])
+    graph.compact()
+    print(f"Graph: {graph.num_users} users, {graph.num_edges} edges, max out-degree {max(graph.out_degree(u) for u in range(args.hubs))}")
+
+    full_times, bounded_times, overlap, truncated, expanded = [], [], [], 0, []
+    for s in sources:
+        full, t = timed(lambda: top_candidates(graph, s, friends_of_friends(graph, s), args.k))
+        full_times.extend(t)
+        result, t = timed(bounded_friends_of_friends, graph, s, limit=args.k, fanout_cap=args.cap, time_budget=args.budget_ms / 1000, seed=1)
+        bounded_times.extend(t)
+        # share of the ideal top-k strength that the bounded picks achieve (robust to ties)
+        exact = friends_of_friends(graph, s)
+        ideal = sum(score for _, score in full)
+        overlap.append(sum(exact[u] for u, _ in result.candidates) / ideal if ideal else 1.0)
+        truncated += result.truncated
+        expanded.append(result.expanded)
+
+    report("full 2-hop", full_times)
+    report(f"bounded (cap={args.cap})", bounded_times)
+    print(f"  strength@{args.k} vs full={sum(overlap) / len(overlap):.3f}  truncated={truncated / len(sources):.2f}  "
+          f"expanded p50={percentile(expanded, 50):.0f}  max latency={max(bounded_times) * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Chunked deletion of a synthetic hub account (needs Neo4j).
+
+Creates `bench_hub` with --edges followers (and follows back a tenth of
+them), then deletes it through `UserCRUD.delete_user`. Reports the per-batch
+transaction time, which bounds how long the hub's locks are held, and the
+peak Python memory of the client during the deletion. All bench_* users are
+removed afterwards.
+
+Usage: python benchmarks/bench_delete.py [--edges 100000] [--batch 1000]
+"""
+import argparse
+import tracemalloc
+
+from common import connect_crud, percentile
+
+
+def build_hub(crud, edges: int):
+    with crud.driver.session() as session:
+        session.run(
+            "MERGE (h:User {username: 'bench_hub'}) SET h.userId = 'bench_hub', h.followersCount = 0, h.followingCount = 0"
+        ).consume()
+        for start in range(0, edges, 10_000):
+            session.run(
+                """
+                UNWIND range($start, $end - 1) AS i
+                MATCH (h:User {username: 'bench_hub'})
+                MERGE (f:User {username: 'bench_f_' + i})
+                SET f.userId = 'bench_f_' + i, f.followersCount = 0, f.followingCount = 1
+                MERGE (f)-[:FOLLOWS]->(h)
+                FOREACH (_ IN CASE WHEN i % 10 = 0 THEN [1] ELSE [] END |
+                    MERGE (h)-[:FOLLOWS]->(f)
+                    SET f.followersCount = 1)
+                """,
+                start=start,
+                end=min(edges, start + 10_000),
+            ).consume()
+        session.run(
+            """
+            MATCH (h:User {username: 'bench_hub'})
+            SET h.followersCount = COUNT { (h)<-[:FOLLOWS]-() }, h.followingCount = COUNT { (h)-[:FOLLOWS]->() }
+            """
+        ).consume()
+
+
+def cleanup(crud):
+    with crud.driver.session() as session:
+        session.run(
+            """
+            MATCH (u:User) WHERE u.username STARTS WITH 'bench_'
+            CALL { WITH u DETACH DELETE u } IN TRANSACTIONS OF 5000 ROWS
+            """
+        ).consume()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--edges", type=int, default=100_000)
+    parser.add_argument("--batch", type=int, default=1000)
+    args = parser.parse_args()
+
+    crud = connect_crud()
+    if crud is None:
+        print("NEO4J_URI not set; this benchmark needs a database.")
+        return
+
+    print(f"Building bench_hub with {args.edges} followers...")
+    build_hub(crud, args.edges)
+
+    batches = []
+    tracemalloc.start()
+    stats = crud.delete_user("bench_hub", batch_size=args.batch, on_batch=batches.append)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    seconds = [b["seconds"] for b in batches]
+    print(f"Deleted: {stats}")
+    print(f"  batches={len(batches)}  total={sum(seconds):.2f}s")
+    print(f"  per-batch tx p50={percentile(seconds, 50) * 1000:.1f}ms  p95={percentile(seconds, 95) * 1000:.1f}ms  max={max(seconds, default=0) * 1000:.1f}ms")
+    print(f"  client peak memory {peak / 1024:.0f} KiB")
+
+    with crud.driver.session() as session:
+        drift = session.run(
+            """
+            MATCH (f:User) WHERE f.username STARTS WITH 'bench_f_'
+              AND (f.followingCount <> COUNT { (f)-[:FOLLOWS]->() } OR f.followersCount <> COUNT { (f)<-[:FOLLOWS]-() })
+            RETURN count(f) AS drifted
+            """
+        ).single()["drifted"]
+    print(f"  neighbors with drifted counters: {drift}")
+    cleanup(crud)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Degrees-of-separation latency: bidirectional versus one-sided BFS.
+
+For each graph size a skewed synthetic graph is built and random
+(source, target) pairs are queried. Reports latency and users visited for
+`shortest_follow_path` and for a plain BFS from the source, and checks that
+both find paths of the same length.
+
+Usage: python benchmarks/bench_paths.py [--sizes 10000,100000,500000]
+"""
+import argparse
+import random
+
+from common import synthetic_graph, timed, report, percentile
+from graph.paths import ConnectionPath, shortest_follow_path
+
+
+def one_sided_bfs(graph, source: int, target: int, max_hops: int = 6, max_visited: int = 100_000) -> ConnectionPath:
+    parents = {source: None}
+    frontier = [source]
+    for _ in range(max_hops):
+        next_frontier = []
+        for u in frontier:
+            for v in graph.followees(u):
+                if v in parents:
+                    continue
+                parents[v] = u
+                if v == target:
+                    path = [v]
+                    while parents[path[-1]] is not None:
+                        path.append(parents[path[-1]])
+                    return ConnectionPath(path[::-1], False, len(parents))
+                next_frontier.append(v)
+            if len(parents) >= max_visited:
+                return ConnectionPath([], True, len(parents))
+        frontier = next_frontier
+        if not frontier:
+            break
+    return ConnectionPath([], bool(frontier), len(parents))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="10000,100000,500000")
+    parser.add_argument("--degree", type=float, default=10.0)
+    parser.add_argument("--skew", type=float, default=1.0)
+    parser.add_argument("--pairs", type=int, default=200)
+    parser.add_argument("--max-hops", type=int, default=6)
+    parser.add_argument("--max-visited", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    for size in (int(s) for s in args.sizes.split(",")):
+        graph = synthetic_graph(size, avg_degree=args.degree, skew=args.skew)
+        print(f"Graph: {graph.num_users} users, {graph.num_edges} edges")
+        rng = random.Random(5)
+        pairs = [tuple(rng.sample(range(size), 2)) for _ in range(args.pairs)]
+
+        bi_times, one_times, bi_visited, one_visited, lengths, mismatches = [], [], [], [], [], 0
+        for s, t in pairs:
+            bi, times = timed(shortest_follow_path, graph, s, t, args.max_hops, args.max_visited)
+            bi_times.extend(times)
+            bi_visited.append(bi.visited)
+            one, times = timed(one_sided_bfs, graph, s, t, args.max_hops, args.max_visited)
+            one_times.extend(times)
+            one_visited.append(one.visited)
+            if bi.path:
+                lengths.append(len(bi.path) - 1)
+            mismatches += len(bi.path) != len(one.path)
+
+        report("bidirectional BFS", bi_times)
+        report("one-sided BFS", one_times)
+        print(f"  visited p50: bidirectional={percentile(bi_visited, 50):.0f}  one-sided={percentile(one_visited, 50):.0f}  "
+              f"found={len(lengths) / len(pairs):.2f}  hops p50={percentile(lengths, 50):.0f}  length mismatches={mismatches}")
+
+
+if __name__ == "__main__":
+    main()
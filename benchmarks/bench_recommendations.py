@@ -0,0 +1,91 @@
+"""Latency and quality of the recommendation modes.
+
+Compares the 2-hop friends-of-friends count (the logic of the Cypher in
+`UserCRUD.get_friend_recommendations`) with personalized PageRank, both by
+power iteration and by Monte Carlo walks.
+
+Quality is measured by edge hold-out: one FOLLOWS edge is removed for a sample
+of users, and a method scores a hit when the removed followee shows up in that
+user's top-k. Coverage is the share of sampled users that get any
+recommendation at all.
+
+Usage: python benchmarks/bench_recommendations.py [--users 200] [--k 5] [--neo4j]
+"""
+import argparse
+import random
+
+from common import load_csv_graph, connect_crud, timed, report
+from graph.follow_graph import FollowGraph
+from graph.ranking import friends_of_friends, personalized_pagerank, monte_carlo_ppr, top_candidates
+from graph.candidates import CandidateIndex
+
+
+def holdout_graph(graph: FollowGraph, sample_size: int, rng: random.Random):
+    """Return (graph without held-out edges, {user: removed followee})."""
+    eligible = [u for u in range(graph.num_users) if graph.out_degree(u) >= 2]
+    sample = rng.sample(eligible, min(sample_size, len(eligible)))
+    held = {u: rng.choice(list(graph.followees(u))) for u in sample}
+    edges = [
+        (graph.usernames[a], graph.usernames[b])
+        for a in range(graph.num_users)
+        for b in graph.followees(a)
+        if held.get(a) != b
+    ]
+    return FollowGraph.from_edges(graph.usernames, edges), held
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=200, help="number of sampled users")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--neo4j", action="store_true", help="also time the Cypher 2-hop query")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    full = load_csv_graph()
+    print(f"Graph: {full.num_users} users, {full.num_edges} edges")
+    graph, held = holdout_graph(full, args.users, rng)
+
+    methods = {
+        "fof (2-hop count)": lambda s: friends_of_friends(graph, s),
+        "ppr (power iteration)": lambda s: personalized_pagerank(graph, s),
+        "ppr-mc (20ms budget)": lambda s: monte_carlo_ppr(graph, s, time_budget=0.02, seed=args.seed),
+    }
+
+    print(f"\nHold-out on {len(held)} users, top-{args.k}:")
+    for label, score in methods.items():
+        hits = covered = 0
+        timings = []
+        for source, removed in held.items():
+            scores, t = timed(score, source)
+            timings.extend(t)
+            top = [u for u, _ in top_candidates(graph, source, scores, args.k)]
+            covered += bool(top)
+            hits += removed in top
+        report(label, timings)
+        print(f"  {'':<28} hit@{args.k}={hits / len(held):.3f}  coverage={covered / len(held):.3f}")
+
+    index, build = timed(CandidateIndex, graph)
+    timings = []
+    for source in held:
+        _, t = timed(index.top, source, args.k)
+        timings.extend(t)
+    print(f"\nCandidateIndex build: {build[0] * 1000:.1f}ms, {len(index.check_consistency(held))} inconsistent users")
+    report("fof-index (lookup)", timings)
+
+    if args.neo4j:
+        crud = connect_crud()
+        if crud is None:
+            print("\nNEO4J_URI not set; skipping Cypher timing.")
+            return
+        timings = []
+        for source in held:
+            _, t = timed(crud.get_friend_recommendations, full.usernames[source])
+            timings.extend(t)
+        print("\nNeo4j round trips (full graph):")
+        report("cypher 2-hop", timings)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""Load time of the binary snapshot versus the CSV files.
+
+Writes the bundled dataset and a synthetic graph to temporary snapshot files
+and times a cold `GraphSnapshot(...).to_graph()` against
+`FollowGraph.from_csv` (which allocates a dict per row).
+
+Usage: python benchmarks/bench_snapshot.py [--users 1000000] [--degree 5]
+"""
+import argparse
+import os
+import tempfile
+
+from common import DATA_DIR, load_csv_graph, synthetic_graph, timed, report
+from graph.snapshot import GraphSnapshot, export_from_csv, write_snapshot
+
+
+def load(path: str):
+    snapshot = GraphSnapshot(path)
+    graph = snapshot.to_graph()
+    # touch both ends of the CSR arrays so the pages are really mapped
+    graph.followees(0), graph.followers(graph.num_users - 1)
+    return snapshot, graph
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--degree", type=float, default=5.0)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "dataset.bbsnap")
+        export_from_csv(str(DATA_DIR / "users.csv"), str(DATA_DIR / "connections.csv"), path)
+        print(f"Bundled dataset ({os.path.getsize(path) / 1024:.0f} KiB snapshot):")
+        _, t = timed(load_csv_graph, repeat=args.repeat)
+        report("csv -> FollowGraph", t)
+        _, t = timed(load, path, repeat=args.repeat)
+        report("snapshot -> FollowGraph", t)
+
+        print(f"\nGenerating synthetic graph: {args.users} users, avg degree {args.degree}...")
+        graph = synthetic_graph(args.users, avg_degree=args.degree)
+        path = os.path.join(tmp, "synthetic.bbsnap")
+        _, t = timed(write_snapshot, path, graph)
+        print(f"  {graph.num_edges} edges, {os.path.getsize(path) / 2**20:.1f} MiB, written in {t[0]:.2f}s")
+        _, t = timed(load, path, repeat=args.repeat)
+        report("snapshot -> FollowGraph", t)
+
+
+if __name__ == "__main__":
+    main()
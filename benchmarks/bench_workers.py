@@ -0,0 +1,61 @@
+"""Throughput of the hash-partitioned graph worker pool.
+
+Runs the same batch of friend-of-friend recommendations (plus a few
+scatter-gather popular/search queries) in-process and through
+`GraphWorkerPool` with an increasing number of workers, keeping every
+request in flight at once.
+
+Usage: python benchmarks/bench_workers.py [--users 200000] [--requests 5000]
+"""
+import argparse
+import os
+import random
+import time
+
+from common import synthetic_graph
+from graph.ranking import friends_of_friends, top_candidates
+from graph.workers import GraphWorkerPool
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=200_000)
+    parser.add_argument("--degree", type=float, default=10.0)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    graph = synthetic_graph(args.users, avg_degree=args.degree)
+    rng = random.Random(1)
+    sources = [rng.randrange(graph.num_users) for _ in range(args.requests)]
+    names = [graph.usernames[u] for u in sources]
+    print(f"Graph: {graph.num_users} users, {graph.num_edges} edges; {args.requests} recommendation requests")
+
+    start = time.perf_counter()
+    for u in sources:
+        top_candidates(graph, u, friends_of_friends(graph, u), 5)
+    baseline = args.requests / (time.perf_counter() - start)
+    print(f"  in-process       {baseline:10.0f} req/s")
+
+    workers = 1
+    while workers <= args.max_workers:
+        with GraphWorkerPool.from_graph(graph, num_workers=workers) as pool:
+            pool.get_popular_users()  # wait until every worker has mapped the snapshot
+            start = time.perf_counter()
+            futures = [pool.submit(pool.partition_of(name), "recommend", name) for name in names]
+            for future in futures:
+                future.result()
+            elapsed = time.perf_counter() - start
+            rate = args.requests / elapsed
+
+            start = time.perf_counter()
+            for _ in range(20):
+                pool.get_popular_users()
+                pool.search_users("user_12")
+            scatter = (time.perf_counter() - start) / 40
+        print(f"  {workers:2d} worker(s)     {rate:10.0f} req/s  ({rate / baseline:.2f}x)  scatter-gather {scatter * 1000:.1f}ms")
+        workers *= 2
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Shared helpers for the benchmark scripts.
+
+The scripts import the application modules the same way `app/main.py` does,
+so the `app/` directory is put on `sys.path` here.
+"""
+import itertools
+import os
+import random
+import sys
+import time
+from array import array
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+APP_DIR = ROOT / "app"
+DATA_DIR = ROOT / "data"
+
+if str(APP_DIR) not in sys.path:
+    sys.path.insert(0, str(APP_DIR))
+
+from graph.follow_graph import FollowGraph, build_csr  # noqa: E402
+
+
+def load_csv_graph() -> FollowGraph:
+    """Load the bundled dataset from `data/users.csv` and `data/connections.csv`."""
+    return FollowGraph.from_csv(str(DATA_DIR / "users.csv"), str(DATA_DIR / "connections.csv"))
+
+
+def synthetic_graph(num_users: int, avg_degree: float = 10.0, skew: float = 1.0, seed: int = 7) -> FollowGraph:
+    """Random graph whose followee choice follows a Zipf-like popularity.
+
+    User 0 is the biggest hub; `skew` = 0 gives uniform choice, larger values
+    concentrate followers on the first few users.
+    """
+    rng = random.Random(seed)
+    cum_weights = list(itertools.accumulate(1.0 / (i + 1) ** skew for i in range(num_users)))
+    population = range(num_users)
+    src = array("i")
+    dst = array("i")
+    for u in range(num_users):
+        k = min(num_users - 1, int(rng.expovariate(1.0 / avg_degree)))
+        for v in rng.choices(population, cum_weights=cum_weights, k=k):
+            if v != u:
+                src.append(u)
+                dst.append(v)
+    out_offsets, out_targets = build_csr(num_users, src, dst)
+    in_offsets, in_targets = build_csr(num_users, dst, src)
+    usernames = [f"user_{i}" for i in range(num_users)]
+    return FollowGraph(usernames, out_offsets, out_targets, in_offsets, in_targets)
+
+
+def connect_crud():
+    """Return a `UserCRUD` when Neo4j credentials are configured, else None."""
+    if not os.getenv("NEO4J_URI"):
+        return None
+    from database import UserCRUD, NEO4J_URI, NEO4J_USERNAME, NEO4J_PASSWORD
+    return UserCRUD(NEO4J_URI, NEO4J_USERNAME, NEO4J_PASSWORD)
+
+
+def timed(fn, *args, repeat: int = 1, **kwargs):
+    """Run `fn` `repeat` times; return (last result, list of per-call seconds)."""
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args, **kwargs)
+        timings.append(time.perf_counter() - start)
+    return result, timings
+
+
+def percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    k = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[k]
+
+
+def report(label: str, timings: list[float]):
+    print(f"  {label:<28} p50={percentile(timings, 50) * 1000:8.2f}ms  p95={percentile(timings, 95) * 1000:8.2f}ms  n={len(timings)}")